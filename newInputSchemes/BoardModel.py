@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''
+	The sorting task's state, kept apart from its widgets: which images are
+	still on the board, which folder each moved image went to, and the
+	running tallies. Every query is constant time, and the widgets follow the
+	model through its signals, so the task can also run without any UI.
+'''
+
+import random, time
+from PySide import QtCore
+
+import assets
+
+folderNames = [
+	'.1,1',	'.1,2',	'.1,3',	'Cats',
+	'.2,1', 'Cows', '.2,3',	'.2,4',
+	'.3,1',	'.3,2',	'Dogs',	'.3,4',
+	'Pigs',	'.4,2', '.4,3',	'.4,4'
+]
+
+def getCategory(imageName):
+	return imageName.split('_')[0]
+	
+def isCorrectFolder(imageName, folderName):
+	return getCategory(imageName).lower() in folderName.lower()
+
+class BoardModel(QtCore.QObject):
+	imageMoved = QtCore.Signal(str, str)
+	finished = QtCore.Signal()
+	
+	def __init__(self, images, folders=folderNames):
+		super().__init__()
+		self.images = list(images)
+		self.folders = list(folders)
+		self.remaining = set(self.images)
+		self.assignments = {}
+		self.folderContents = dict((folder, []) for folder in self.folders)
+		self.correct = 0
+		self.incorrect = 0
+		self.firstMoveTime = None
+		
+	@classmethod
+	def fromAssets(cls, shuffle=True):
+		images = assets.getFileList('animals')
+		if shuffle:
+			random.shuffle(images)
+		return cls(images)
+		
+	def moveImage(self, imageName, folderName):
+		if imageName not in self.remaining:
+			raise ValueError('%s is not on the board' % imageName)
+		if folderName not in self.folderContents:
+			raise ValueError('%s is not a folder' % folderName)
+			
+		if self.firstMoveTime is None:
+			self.firstMoveTime = time.time()
+			
+		self.remaining.remove(imageName)
+		self.assignments[imageName] = folderName
+		self.folderContents[folderName].append(imageName)
+		if isCorrectFolder(imageName, folderName):
+			self.correct += 1
+		else:
+			self.incorrect += 1
+			
+		self.imageMoved.emit(imageName, folderName)
+		if len(self.remaining) == 0:
+			self.finished.emit()
+			
+	def isOnBoard(self, imageName):
+		return imageName in self.remaining
+		
+	def getFolderOf(self, imageName):
+		return self.assignments.get(imageName)
+		
+	def getFolderContents(self, folderName):
+		return list(self.folderContents[folderName])
+		
+	def getRemainingImageCount(self):
+		return len(self.remaining)
+		
+	def getMoveCount(self):
+		return self.correct + self.incorrect
+		
+	def getCorrectCount(self):
+		return self.correct
+		
+	def getIncorrectCount(self):
+		return self.incorrect
+		
+	def isFinished(self):
+		return len(self.remaining) == 0
+		
+	def getScore(self, now=None):
+		if now is None:
+			now = time.time()
+		return 8000.0 * pow(self.correct / (self.correct + self.incorrect), 3) / pow(now - self.firstMoveTime, 0.5)
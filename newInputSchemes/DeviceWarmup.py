@@ -0,0 +1,76 @@
+'''
+	Starts the EyeTribe server, the Leap connection and image decoding in the
+	background while the scheme selector is up, so schemes can attach to
+	devices that are already running. Only the devices asked for ('gaze',
+	'gesture') are started.
+'''
+import logging, sys, threading
+
+_eyeTribeServer = None
+_leapController = None
+_threads = {}
+
+def start(devices=()):
+	global _eyeTribeServer
+	# the server is a Windows executable
+	if 'gaze' in devices and _eyeTribeServer is None and sys.platform == 'win32':
+		from GazeDevice import EyeTribeServer
+		try:
+			_eyeTribeServer = EyeTribeServer()
+			_eyeTribeServer.start()
+		except Exception as exc:
+			logging.warning('Could not warm up EyeTribe server: %s' % exc)
+			_eyeTribeServer = None
+
+	if 'gesture' in devices:
+		_startThread('leap', _connectLeap)
+	_startThread('assets', _preloadAssets)
+
+def _startThread(name, target):
+	if name in _threads:
+		return
+	thread = threading.Thread(target=target)
+	thread.daemon = True
+	thread.start()
+	_threads[name] = thread
+
+def _connectLeap():
+	global _leapController
+	try:
+		import Leap
+		controller = Leap.Controller()
+		controller.set_policy_flags(Leap.Controller.POLICY_BACKGROUND_FRAMES)
+		_leapController = controller
+	except Exception as exc:
+		logging.warning('Could not warm up Leap controller: %s' % exc)
+
+def _preloadAssets():
+	import assets
+	from DragDropUI import imageSize, folderSize, thumbnailSize
+	try:
+		# only the scaled sizes the board uses; these come from the thumbnail cache when it has them
+		paths = [ 'animals/%s' % f for f in assets.getFileList('animals') ]
+		assets.preloadImages(paths, [imageSize, thumbnailSize])
+		assets.preloadImages(['folder.png'], [folderSize])
+	except Exception as exc:
+		logging.warning('Could not preload assets: %s' % exc)
+
+def wait(timeout=None):
+	for thread in list(_threads.values()):
+		thread.join(timeout)
+
+def getEyeTribeServer():
+	return _eyeTribeServer
+
+def getLeapController():
+	# the connection thread may still be importing Leap; wait for it rather than connecting twice
+	thread = _threads.get('leap')
+	if thread is not None:
+		thread.join()
+	return _leapController
+
+def stop():
+	global _eyeTribeServer
+	if _eyeTribeServer is not None and _eyeTribeServer.isRunning():
+		_eyeTribeServer.stop()
+	_eyeTribeServer = None
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
-import sys, logging, time
+import sys, logging
 
 from PySide import QtGui, QtCore
 
@@ -15,31 +15,17 @@ loadingWindow = None
 gazeCalibrationWindow = None
 scheme = None
 
-startTime = None
-correct = 0
-incorrect = 0
 def imageMoved(imageName, destination):
-	global window, gazeCalibrationWindow, scheme, startTime, correct, incorrect
 	logging.info('Moved %s to %s', imageName, destination)
 	
-	if startTime is None:
-		startTime = time.time()
-	animalType = imageName.split('_')[0]
-	if animalType.lower() in destination.lower():
-		correct += 1
-	else:
-		incorrect += 1
-		
-	if window.getRemainingImageCount() < 1:
-		score = 1
-		
-		window.hide()
-		QtCore.QTimer.singleShot(0, doScore)
+def boardFinished():
+	window.hide()
+	QtCore.QTimer.singleShot(0, doScore)
 		
 def doScore():
 	global window
 	try:
-		score = 8000.0 * pow(correct / (correct + incorrect), 3) / pow(time.time() - startTime, 0.5)
+		score = window.board.getScore()
 	except Exception as exc:
 		logging.error('Error calculating score')
 		logging.error('%s' % exc)
@@ -52,8 +38,8 @@ def doScore():
 	box.finished.connect(window.close)
 	box.show()
 
-def main(selectedScheme, app=None):
-	global window, gazeCalibrationWindow, scheme, startTime, correct, incorrect
+def main(selectedScheme, app=None, calibrate=True):
+	global window, gazeCalibrationWindow, scheme
 	
 	scheme = selectedScheme
 	
@@ -63,20 +49,23 @@ def main(selectedScheme, app=None):
 
 	window = DragDropTaskWindow()
 	window.closed.connect(closeDown)
-	
-	scheme.imageMoved.connect(imageMoved)
+	window.board.imageMoved.connect(imageMoved)
+	window.board.finished.connect(boardFinished)
 
 	window.optionsWindow = DeviceOptionsWindow()
 	if hasattr(scheme, 'gestureTracker'):
 		window.optionsWindow.addGestureControls(scheme)
 		
 	if hasattr(scheme, 'gazeTracker'):
+		window.optionsWindow.addGazeControls(scheme.gazeTracker)
+		
+	if hasattr(scheme, 'gazeTracker') and calibrate:
 		gazeCalibrationWindow = CalibrationWindow(scheme.gazeTracker)
 		gazeCalibrationWindow.closed.connect(showMainWindow)
 		gazeCalibrationWindow.show()
-		
-		window.optionsWindow.addGazeControls(scheme.gazeTracker)
 	else:
+		if hasattr(scheme, 'gazeTracker'):
+			scheme.gazeTracker.startPolling()
 		showMainWindow()
 
 	if forceStart:
@@ -86,16 +75,16 @@ def main(selectedScheme, app=None):
 
 
 def closeDown():
-	if hasattr(scheme, 'gazeTracker'):
-		scheme.gazeTracker.stop()
-	if hasattr(scheme, 'gestureTracker'):
-		scheme.gestureTracker.stop()
+	# devices stay connected for the next trial
+	scheme.stop()
 	
 def showMainWindow():
 	global window, scheme
 	scheme.setWindow(window)
 	window.showFullScreen()
 	scheme.start()
+	# these should stay flat from one trial to the next
+	scheme.logReceiverCounts()
 
 if __name__ == '__main__':
 	scheme = getattr(InputScheme, sys.argv[0])()
@@ -1,7 +1,10 @@
 import logging
-import os, random
+import os
+from collections import Counter
 from PySide import QtGui, QtCore
 from FlowLayout import *
+from IconIndex import IconIndex
+from BoardModel import BoardModel
 
 import settings, assets
 
@@ -11,20 +14,39 @@ class DragDropTaskWindow(QtGui.QWidget):
 	mouseReleased = QtCore.Signal(object, object)
 	mouseMoved = QtCore.Signal(object, object)
 
-	def __init__(self):
+	def __init__(self, board=None, boardView=None):
 		super().__init__()
 		self.loaded = False
 		self.optionsWindow = None
 		self.feedbackWindow = InputFeedbackWindow(self)
+		self.board = board if board is not None else BoardModel.fromAssets()
+		# dragging shows thumbnails, which must not be rescaled mid-drag however big the board is
+		assets.pinPixmaps([ ('animals/%s' % imageName, thumbnailSize) for imageName in self.board.images ])
 		
 		self.mainContainer = QtGui.QWidget(self)
 		self.mainContainer.setLayout(QtGui.QHBoxLayout())
 		
-		self.foldersWindow = FoldersWindow()
-		self.imagesWindow = ImagesWindow()
+		if boardView is None:
+			boardView = settings.systemValue('boardView')
+		if boardView == 'graphics':
+			# the graphics views do their own hit testing
+			from GraphicsBoard import FoldersView, ImagesView
+			self.foldersWindow = FoldersView(self.board)
+			self.imagesWindow = ImagesView(self.board)
+			self.iconIndex = None
+		else:
+			self.foldersWindow = FoldersWindow(self.board)
+			self.imagesWindow = ImagesWindow(self.board)
+			self.iconIndex = IconIndex(self, IconLayout)
+			for scrollArea in [self.foldersWindow, self.imagesWindow]:
+				scrollArea.widget().layout().geometryChanged.connect(self.iconIndex.invalidate)
+				scrollArea.verticalScrollBar().valueChanged.connect(self.iconIndex.invalidate)
+				scrollArea.horizontalScrollBar().valueChanged.connect(self.iconIndex.invalidate)
 		self.mainContainer.layout().addWidget(self.foldersWindow)
 		self.mainContainer.layout().addWidget(self.imagesWindow)
 		
+		self.cursorOverlay = CursorOverlay(self)
+		
 		self.loaded = True
 		
 		font = self.font()
@@ -34,11 +56,13 @@ class DragDropTaskWindow(QtGui.QWidget):
 		
 	def show(self):
 		super().show()
+		self.cursorOverlay.raise_()
 		self.feedbackWindow.raise_()
 		self.feedbackWindow.show()
 		
 	def showFullScreen(self):
 		super().showFullScreen()
+		self.cursorOverlay.raise_()
 		self.feedbackWindow.raise_()
 		self.feedbackWindow.show()
 		
@@ -59,7 +83,29 @@ class DragDropTaskWindow(QtGui.QWidget):
 		recursive_set(self)
         
 	def getRemainingImageCount(self):
-		return self.imagesWindow.getRemainingImageCount()
+		return self.board.getRemainingImageCount()
+		
+	def iconAt(self, x, y):
+		if self.iconIndex is None:
+			for view in [self.foldersWindow, self.imagesWindow]:
+				icon = view.iconAt(x, y)
+				if icon is not None:
+					return icon
+			return None
+		return self.iconIndex.iconAt(x, y)
+		
+	def invalidateIcons(self):
+		if self.iconIndex is not None:
+			self.iconIndex.invalidate()
+		
+	def getIcon(self, imageName):
+		return self.imagesWindow.icons.get(imageName)
+		
+	def getFolderIcon(self, folderName):
+		return self.foldersWindow.icons.get(folderName)
+		
+	def ensureIconVisible(self, icon):
+		self.imagesWindow.ensureIconVisible(icon)
 	
 	def keyPressEvent(self, event):
 		super().keyPressEvent(event)
@@ -90,12 +136,33 @@ class DragDropTaskWindow(QtGui.QWidget):
 		
 	def resizeEvent(self, e):
 		self.mainContainer.resize(self.width(), self.height())
+		self.cursorOverlay.resize(self.width(), self.height())
+		self.invalidateIcons()
+		
+	def moveEvent(self, e):
+		super().moveEvent(e)
+		self.invalidateIcons()
+
+# paints and pixmap swaps by kind of element, to check that repaints only follow visible changes
+repaintCounts = Counter()
+
+def getRepaintCounts():
+	return dict(repaintCounts)
+	
+def resetRepaintCounts():
+	repaintCounts.clear()
+
+imageSize = (200, 175)
+folderSize = (200, 200)
+thumbnailSize = (75, 75)
 
 class IconLayout(QtGui.QWidget):
-	def __init__(self, image, text):
+	isFolder = False
+	
+	def __init__(self, imagePath, text, size=imageSize):
 		super().__init__()
 
-		self.image = image
+		self.imagePath = imagePath
 		self.text = text
 		
 		self.selected = False
@@ -103,7 +170,11 @@ class IconLayout(QtGui.QWidget):
 
 		self.imageWidget = QtGui.QLabel()
 		self.imageWidget.setAlignment(QtCore.Qt.AlignCenter)
-		self.imageWidget.setPixmap(QtGui.QPixmap.fromImage(self.image))
+		# the board shows straight away; images fill in as they are decoded
+		self.imageWidget.setPixmap(assets.getPlaceholder(size))
+		assets.loadQPixmap(imagePath, size, self.imageWidget.setPixmap)
+		# scaled now so picking the icon up doesn't have to
+		assets.loadQPixmap(imagePath, thumbnailSize)
 
 		if text[0] == '.':
 			text = ''
@@ -128,22 +199,32 @@ class IconLayout(QtGui.QWidget):
 		self.setHovered(False)
 		
 	def setHovered(self, enabled=True):
-		self.hovered = enabled
-		self.update()
+		if self.hovered != enabled:
+			self.hovered = enabled
+			self.update()
 		
 	def setUnselected(self):
 		self.setSelected(False)
 		
 	def setSelected(self, enabled=True):
-		self.selected = enabled
-		self.update()
+		if self.selected != enabled:
+			self.selected = enabled
+			self.update()
 
+	def getThumbnail(self):
+		return assets.getQPixmap(self.imagePath, thumbnailSize)
+		
+	def globalCenter(self):
+		center = self.mapToGlobal(self.rect().center())
+		return [center.x(), center.y()]
+		
 	def blink(self):
 		self.setSelected(True)
 		QtCore.QTimer.singleShot(500, self.setUnselected)
 		
 	def paintEvent(self, event):
 		super().paintEvent(event)
+		repaintCounts['icon'] += 1
 		if self.selected:
 			bg = QtGui.QColor(QtCore.Qt.darkGreen)
 			bg.setAlpha(128)
@@ -160,6 +241,8 @@ class IconLayout(QtGui.QWidget):
 			painter.drawRect(0, 0, self.width(), self.height())
 
 class FolderIcon(IconLayout):
+	isFolder = True
+	
 	def initUI(self):
 		layout = QtGui.QStackedLayout()
 		layout.setStackingMode(layout.StackAll)
@@ -171,39 +254,47 @@ class FolderIcon(IconLayout):
 		self.setHovered(False)
 
 class ImagesWindow(QtGui.QScrollArea):
-	def __init__(self):
+	def __init__(self, board):
 		super().__init__()
+		self.board = board
+		self.icons = {}
 		self.setWidgetResizable(True)
 		self.initUI()
+		self.board.imageMoved.connect(self.imageMoved)
 
 	def initUI(self):
 		container = QtGui.QWidget()
 		layout = FlowLayout(spacing=0)
 		container.setLayout(layout)
 	
-		images = assets.getFileList('animals')
-		random.shuffle(images)
-		for imageName in images:
-			image = assets.getQImage('animals/%s' % imageName).scaled(200, 175)
-
-			w = IconLayout(image, imageName)
+		for imageName in self.board.images:
+			w = IconLayout('animals/%s' % imageName, imageName)
+			self.icons[imageName] = w
 			layout.addWidget(w)
 
 		container.setLayout(layout)
 		self.setWidget(container)
 		self.setWindowTitle('Images')
 		
+	def imageMoved(self, imageName, folderName):
+		# a blank keeps the rest of the board where it was
+		icon = self.icons.pop(imageName)
+		replacement = QtGui.QWidget(icon.parent())
+		replacement.setMinimumSize(icon.size())
+		self.widget().layout().replaceItem(icon, replacement)
+		icon.setParent(None)
+		
 	def getRemainingImageCount(self):
-		layout = self.widget().layout()
-		count = 0
-		for i in range(layout.count()):
-			if isinstance(layout.itemAt(i).widget(), IconLayout):
-				count = count + 1
-		return count
+		return self.board.getRemainingImageCount()
+		
+	def ensureIconVisible(self, icon):
+		self.ensureWidgetVisible(icon)
 		
 class FoldersWindow(QtGui.QScrollArea):
-	def __init__(self):
+	def __init__(self, board):
 		super().__init__()
+		self.board = board
+		self.icons = {}
 		self.setWidgetResizable(True)
 		self.initUI()
 
@@ -211,22 +302,83 @@ class FoldersWindow(QtGui.QScrollArea):
 		container = QtGui.QWidget()
 		layout = FlowLayout(spacing=0)
 		
-		image = assets.getQImage('folder.png').scaled(200, 200)
-		folderNames = [
-			'.1,1',	'.1,2',	'.1,3',	'Cats',
-			'.2,1', 'Cows', '.2,3',	'.2,4',
-			'.3,1',	'.3,2',	'Dogs',	'.3,4',
-			'Pigs',	'.4,2', '.4,3',	'.4,4'
-		]
-		#folderNames = sorted(folderNames)
-		for i in range(len(folderNames)):
-			w = FolderIcon(image, folderNames[i])
+		for folderName in self.board.folders:
+			w = FolderIcon('folder.png', folderName, folderSize)
+			self.icons[folderName] = w
 			layout.addWidget(w)
 
 		container.setLayout(layout)
 		self.setWidget(container)
 		self.setWindowTitle('Folders')
 
+'''
+	Draws the virtual cursor and the dragged thumbnail on top of the board, so
+	schemes never have to move or query the OS pointer. Only the rectangles
+	that changed are repainted.
+'''
+class CursorOverlay(QtGui.QWidget):
+	cursorRadius = 10
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+		self.setAttribute(QtCore.Qt.WA_NoSystemBackground)
+		
+		self.cursorVisible = False
+		self.cursorPos = None
+		self.thumbnail = None
+		self.thumbnailPos = None
+		
+	def setCursorVisible(self, visible):
+		self.cursorVisible = visible
+		self.update(self._cursorRect())
+		
+	def setCursorPosition(self, x, y):
+		oldRect = self._cursorRect()
+		self.cursorPos = self.mapFromGlobal(QtCore.QPoint(round(x), round(y)))
+		if self.cursorVisible:
+			self.update(oldRect)
+			self.update(self._cursorRect())
+			
+	def setThumbnail(self, pixmap):
+		self.update(self._thumbnailRect())
+		self.thumbnail = pixmap
+		self.update(self._thumbnailRect())
+		
+	def moveThumbnail(self, x, y):
+		oldRect = self._thumbnailRect()
+		self.thumbnailPos = self.mapFromGlobal(QtCore.QPoint(round(x), round(y)))
+		self.update(oldRect)
+		self.update(self._thumbnailRect())
+		
+	def _cursorRect(self):
+		if self.cursorPos is None:
+			return QtCore.QRect()
+		r = self.cursorRadius + 1
+		return QtCore.QRect(self.cursorPos.x() - r, self.cursorPos.y() - r, 2*r + 1, 2*r + 1)
+		
+	def _thumbnailRect(self):
+		if self.thumbnail is None or self.thumbnailPos is None:
+			return QtCore.QRect()
+		return QtCore.QRect(self.thumbnailPos, self.thumbnail.size())
+		
+	def paintEvent(self, event):
+		painter = QtGui.QPainter(self)
+		painter.setClipRect(event.rect())
+		
+		thumbnailRect = self._thumbnailRect()
+		if not thumbnailRect.isEmpty() and thumbnailRect.intersects(event.rect()):
+			painter.drawPixmap(thumbnailRect.topLeft(), self.thumbnail)
+			
+		cursorRect = self._cursorRect()
+		if self.cursorVisible and not cursorRect.isEmpty() and cursorRect.intersects(event.rect()):
+			painter.setRenderHint(painter.RenderHint.Antialiasing)
+			color = QtGui.QColor(QtCore.Qt.darkGreen)
+			color.setAlpha(160)
+			painter.setPen(QtGui.QColor(QtCore.Qt.white))
+			painter.setBrush(color)
+			painter.drawEllipse(self.cursorPos, self.cursorRadius, self.cursorRadius)
+
 class InputFeedbackWindow(QtGui.QWidget):
 	def __init__(self, parent):
 		super().__init__(parent)
@@ -244,6 +396,8 @@ class InputFeedbackWindow(QtGui.QWidget):
 		self.eyeGood = False
 		self.handGood = False
 		self.handOpen = True
+		self.shownEye = None
+		self.shownHand = None
 		
 		self.gestureBoundsWindows = {}
 		
@@ -282,52 +436,65 @@ class InputFeedbackWindow(QtGui.QWidget):
 			
 		self._updateIcons()
 	
+	# the setters are called on every device sample; labels only change on a real transition
 	def _updateIcons(self):
-		if self.eyeWidget is not None:
+		if self.eyeWidget is not None and self.shownEye != self.eyeGood:
 			self.eyeWidget.setPixmap(self.eyeImages[self.eyeGood])
+			self.shownEye = self.eyeGood
+			repaintCounts['feedback'] += 1
 		
-		if self.handWidget is not None:
+		hand = (self.handGood, self.handOpen)
+		if self.handWidget is not None and self.shownHand != hand:
 			self.handWidget.setPixmap(self.handImages[self.handGood][self.handOpen])
+			self.shownHand = hand
+			repaintCounts['feedback'] += 1
 			
 	def setHandGood(self):
 #		logging.debug("Hand good")
-		self.handGood = True
-		self._updateIcons()
+		if not self.handGood:
+			self.handGood = True
+			self._updateIcons()
 	
 	def setHandBad(self):
 #		logging.debug("Hand bad")
-		self.handGood = False
-		self._updateIcons()
+		if self.handGood:
+			self.handGood = False
+			self._updateIcons()
 	
 	def setHandOpen(self):
 #		logging.debug("Hand open")
-		self.handOpen = True
-		self._updateIcons()
+		if not self.handOpen:
+			self.handOpen = True
+			self._updateIcons()
 	
 	def setHandClosed(self):
 #		logging.debug("Hand closed")
-		self.handOpen = False
-		self._updateIcons()
+		if self.handOpen:
+			self.handOpen = False
+			self._updateIcons()
 
 	def setEyeGood(self):
 #		logging.debug("Eyes good")
-		self.eyeGood = True
-		self._updateIcons()
+		if not self.eyeGood:
+			self.eyeGood = True
+			self._updateIcons()
 		
 	def setEyeBad(self):
 #		logging.debug("Eyes bad")
-		self.eyeGood = False
-		self._updateIcons()
+		if self.eyeGood:
+			self.eyeGood = False
+			self._updateIcons()
 		
 	def setGestureBoundNotice(self, direction, state):
 		if not direction in self.gestureBoundsWindows:
 			self.gestureBoundsWindows[direction] = BoundsWarningWindow(self.parentWidget(), direction)
 			
-		if state:
-			self.gestureBoundsWindows[direction].raise_()
-			self.gestureBoundsWindows[direction].show()
-		else:
-			self.gestureBoundsWindows[direction].hide()
+		window = self.gestureBoundsWindows[direction]
+		if state and not window.isVisible():
+			window.raise_()
+			window.show()
+		elif not state and window.isVisible():
+			window.hide()
 			
 	def closeEvent(self, e):
 		super().closeEvent(e)
@@ -412,6 +579,16 @@ class DeviceOptionsWindow(QtGui.QWidget):
 		accelerationBox.setSingleStep(0.25)
 		accelerationBox.valueChanged.connect(scheme.gestureTracker.setAcceleration)
 		
+		import TransferFunction
+		transferCurveBox = QtGui.QComboBox()
+		transferCurveBox.addItems(TransferFunction.CURVES)
+		transferCurveBox.setCurrentIndex(max(0, transferCurveBox.findText(scheme.gestureTracker.getTransferCurve())))
+		transferCurveBox.currentIndexChanged[str].connect(scheme.gestureTracker.setTransferCurve)
+		
+		transferPointsBox = QtGui.QLineEdit(str(scheme.gestureTracker.getTransferPoints()))
+		transferPointsBox.setPlaceholderText('input:output, ... (piecewise/fitted)')
+		transferPointsBox.editingFinished.connect(lambda: scheme.gestureTracker.setTransferPoints(transferPointsBox.text()))
+		
 		grabThresholdBox = QtGui.QDoubleSpinBox()
 		grabThresholdBox.setValue(scheme.gestureTracker.grabThreshold)
 		grabThresholdBox.setRange(0, 100)
@@ -425,6 +602,21 @@ class DeviceOptionsWindow(QtGui.QWidget):
 		releaseThresholdBox.setSingleStep(1)
 		releaseThresholdBox.setSuffix("%")
 		releaseThresholdBox.valueChanged.connect(scheme.gestureTracker.setReleaseThreshold)
+		
+		selectionModeBox = QtGui.QComboBox()
+		selectionModeBox.addItems(['threshold', 'keyTap', 'screenTap'])
+		selectionModeBox.setCurrentIndex(max(0, selectionModeBox.findText(scheme.gestureTracker.getSelectionMode())))
+		selectionModeBox.currentIndexChanged[str].connect(scheme.gestureTracker.setSelectionMode)
+		
+		predictGrabBox = QtGui.QCheckBox()
+		predictGrabBox.setChecked(scheme.gestureTracker.getPredictGrab())
+		predictGrabBox.stateChanged.connect(lambda state: scheme.gestureTracker.setPredictGrab(state == QtCore.Qt.Checked))
+		
+		grabPredictionConfidenceBox = QtGui.QDoubleSpinBox()
+		grabPredictionConfidenceBox.setRange(0, 1)
+		grabPredictionConfidenceBox.setValue(scheme.gestureTracker.getGrabPredictionConfidence())
+		grabPredictionConfidenceBox.setSingleStep(.05)
+		grabPredictionConfidenceBox.valueChanged.connect(scheme.gestureTracker.setGrabPredictionConfidence)
 
 #		pinchThresholdBox = QtGui.QDoubleSpinBox()
 #		pinchThresholdBox.setValue(scheme.gestureTracker.pinchThreshold)
@@ -489,8 +681,13 @@ class DeviceOptionsWindow(QtGui.QWidget):
 			[self.calibrateButton, self.currentGrabBox],
 			['Movement prescale', prescaleBox],
 			['Movement acceleration', accelerationBox],
+			['Movement curve', transferCurveBox],
+			['Curve points', transferPointsBox],
 			['Grab threshold', grabThresholdBox],
 			['Release threshold', releaseThresholdBox],
+			['Selection gesture', selectionModeBox],
+			['Predict grab', predictGrabBox],
+			['Prediction confidence', grabPredictionConfidenceBox],
 			['Dwell duration', dwellDurationBox],
 			['Dwell range', dwellRangeBox],
 			['Attention memory', attentionDurationBox],
@@ -501,11 +698,12 @@ class DeviceOptionsWindow(QtGui.QWidget):
 #			['Current pinch value', self.currentPinchBox],
 		])
 		
-		scheme.gestureTracker.grabValued.connect(self.setGrabValue)
-#		scheme.gestureTracker.pinchValued.connect(self.setPinchValue)
-		scheme.gestureTracker.noHands.connect(self.setGrabValue)
-		scheme.gestureTracker.grabbed.connect(self.grabbed)
-		scheme.gestureTracker.released.connect(self.released)
+		# the tracker outlives this window when the scheme is reused, so the scheme undoes these when the trial ends
+		scheme.connectSignal(scheme.gestureTracker.grabValued, self.setGrabValue)
+#		scheme.connectSignal(scheme.gestureTracker.pinchValued, self.setPinchValue)
+		scheme.connectSignal(scheme.gestureTracker.noHands, self.setGrabValue)
+		scheme.connectSignal(scheme.gestureTracker.grabbed, self.grabbed)
+		scheme.connectSignal(scheme.gestureTracker.released, self.released)
 		
 	def addGazeControls(self, gazeTracker):
 		self.gazeTracker = gazeTracker
@@ -529,6 +727,13 @@ class DeviceOptionsWindow(QtGui.QWidget):
 		attentionDurationBox.setSingleStep(.1)
 		attentionDurationBox.setSuffix("s")
 		attentionDurationBox.valueChanged.connect(gazeTracker.setAttentionStalePeriod)
+		
+		gestureLatencyBox = QtGui.QDoubleSpinBox()
+		gestureLatencyBox.setValue(gazeTracker.getGestureLatency())
+		gestureLatencyBox.setRange(0, 1)
+		gestureLatencyBox.setSingleStep(.05)
+		gestureLatencyBox.setSuffix("s")
+		gestureLatencyBox.valueChanged.connect(gazeTracker.setGestureLatency)
 
 		calibrateButton = QtGui.QPushButton('Calibrate gaze')
 		calibrateButton.setCheckable(True)
@@ -540,6 +745,7 @@ class DeviceOptionsWindow(QtGui.QWidget):
 			['Dwell duration', dwellDurationBox],
 			['Dwell range', dwellRangeBox],
 			['Attention memory', attentionDurationBox],
+			['Gesture latency', gestureLatencyBox],
 		])
 		
 	def showGazeCalibration(self):
@@ -59,6 +59,8 @@ class Window(QtGui.QWidget):
 		self.setWindowTitle("Flow Layout")
 
 class FlowLayout(QtGui.QLayout):
+	geometryChanged = QtCore.Signal()
+
 	def __init__(self, parent=None, margin=0, spacing=5):
 		super(FlowLayout, self).__init__(parent)
 
@@ -74,6 +76,19 @@ class FlowLayout(QtGui.QLayout):
 
 		self.itemList = []
 		self.needsToBeReplaced = None
+		# widget -> position in itemList, so replacing an item doesn't search
+		self.indexOf = {}
+		self.clearCaches()
+
+	def clearCaches(self):
+		self.sizeHints = None
+		self.cachedMinimumSize = None
+		self.heights = {}
+		self.laidOutRect = None
+
+	def invalidate(self):
+		self.clearCaches()
+		super(FlowLayout, self).invalidate()
 
 	def __del__(self):
 		item = self.takeAt(0)
@@ -81,13 +96,15 @@ class FlowLayout(QtGui.QLayout):
 			item = self.takeAt(0)
 
 	def addItem(self, item):
-		if self.needsToBeReplaced is not None:
-			for i, existingItem in enumerate(self.itemList):
-				if existingItem.widget() == self.needsToBeReplaced:
-					self.itemList[i] = item
-			self.needsToBeReplaced = None
+		if self.needsToBeReplaced is not None and self.needsToBeReplaced in self.indexOf:
+			i = self.indexOf.pop(self.needsToBeReplaced)
+			self.itemList[i] = item
 		else:
+			i = len(self.itemList)
 			self.itemList.append(item)
+		self.needsToBeReplaced = None
+		self.indexOf[item.widget()] = i
+		self.clearCaches()
 
 	def replaceItem(self, oldItem, newItem):
 		self.needsToBeReplaced  = oldItem
@@ -104,7 +121,12 @@ class FlowLayout(QtGui.QLayout):
 
 	def takeAt(self, index):
 		if index >= 0 and index < len(self.itemList):
-			return self.itemList.pop(index)
+			item = self.itemList.pop(index)
+			self.indexOf.pop(item.widget(), None)
+			for i in range(index, len(self.itemList)):
+				self.indexOf[self.itemList[i].widget()] = i
+			self.clearCaches()
+			return item
 
 		return None
 
@@ -115,46 +137,55 @@ class FlowLayout(QtGui.QLayout):
 		return True
 
 	def heightForWidth(self, width):
-		height = self.doLayout(QtCore.QRect(0, 0, width, 0), True)
-		return height
+		if width not in self.heights:
+			self.heights[width] = self.doLayout(QtCore.QRect(0, 0, width, 0), True)
+		return self.heights[width]
 
 	def setGeometry(self, rect):
 		super(FlowLayout, self).setGeometry(rect)
+		if rect == self.laidOutRect:
+			return
 		self.doLayout(rect, False)
+		self.laidOutRect = QtCore.QRect(rect)
+		self.geometryChanged.emit()
 
 	def sizeHint(self):
 		return self.minimumSize()
 
 	def minimumSize(self):
-		size = QtCore.QSize()
+		if self.cachedMinimumSize is None:
+			size = QtCore.QSize()
 
-		for item in self.itemList:
-			size = size.expandedTo(item.minimumSize())
+			for item in self.itemList:
+				size = size.expandedTo(item.minimumSize())
 
-		size += QtCore.QSize(2 * self.margin, 2 * self.margin)
-		return size
+			size += QtCore.QSize(2 * self.margin, 2 * self.margin)
+			self.cachedMinimumSize = size
+		return QtCore.QSize(self.cachedMinimumSize)
 		
 	def doLayout(self, rect, testOnly):
 		x = rect.x()
 		y = rect.y()
 		lineHeight = 0
 
-		for item in self.itemList:
-			wid = item.widget()
+		if self.sizeHints is None:
+			self.sizeHints = [ item.sizeHint() for item in self.itemList ]
+
+		for item, sizeHint in zip(self.itemList, self.sizeHints):
 			# spaceX = self.spacing() + wid.style().layoutSpacing(QtGui.QSizePolicy.PushButton, QtGui.QSizePolicy.PushButton, QtCore.Qt.Horizontal)
 			# spaceY = self.spacing() + wid.style().layoutSpacing(QtGui.QSizePolicy.PushButton, QtGui.QSizePolicy.PushButton, QtCore.Qt.Vertical)
-			nextX = x + item.sizeHint().width() + self.spaceX
+			nextX = x + sizeHint.width() + self.spaceX
 			if nextX - self.spaceX > rect.right() and lineHeight > 0:
 				x = rect.x()
 				y = y + lineHeight + self.spaceY
-				nextX = x + item.sizeHint().width() + self.spaceX
+				nextX = x + sizeHint.width() + self.spaceX
 				lineHeight = 0
 
 			if not testOnly:
-				item.setGeometry(QtCore.QRect(QtCore.QPoint(x, y), item.sizeHint()))
+				item.setGeometry(QtCore.QRect(QtCore.QPoint(x, y), sizeHint))
 
 			x = nextX
-			lineHeight = max(lineHeight, item.sizeHint().height())
+			lineHeight = max(lineHeight, sizeHint.height())
 
 		return y + lineHeight - rect.y()
 
@@ -3,6 +3,8 @@ import logging
 
 from PySide import QtGui, QtCore
 
+import assets
+
 xResolution, yResolution = 3, 3
 instructions = '''
 	Please sit comfortably.
@@ -34,13 +36,14 @@ class CalibrationWindow(QtGui.QWidget):
 		self.target = TargetWidget(parent=self)
 		self.target.hide()
 
-		self.eyeTimer = QtCore.QTimer()
-		self.eyeTimer.setSingleShot(False)
-		self.eyeTimer.timeout.connect(self.moveEyes)
-
-		self.gazeTimer = QtCore.QTimer()
-		self.gazeTimer.setSingleShot(False)
-		self.gazeTimer.timeout.connect(self.trackGazeWithTarget)
+		# one tick per frame drives both the eyes and the gaze-following target,
+		# so each frame costs one round of property changes and one paint
+		self.frameRate = 30
+		self.trackingGaze = False
+		self.frameTimer = QtCore.QTimer()
+		self.frameTimer.setSingleShot(False)
+		self.frameTimer.timeout.connect(self.tick)
+		self.desktopSize = QtGui.QDesktopWidget().screenGeometry()
 
 		self.pointLabels = []
 		self.showCalibratedLabels()
@@ -63,8 +66,7 @@ class CalibrationWindow(QtGui.QWidget):
 		self.gazeTracker.eyesAppeared.connect(self.setEyesGood)
 		self.gazeTracker.eyesDisappeared.connect(self.setEyesBad)
 		
-		self.eyeTimer.start(1000/30)
-		self.gazeTimer.start(1000/30)
+		self.frameTimer.start(1000/self.frameRate)
 		self.gazeTracker.startPolling()
 		
 		self.points = None
@@ -75,10 +77,16 @@ class CalibrationWindow(QtGui.QWidget):
 	def setEyesGood(self):
 		self.eyes.ok = True
 		
+	def tick(self):
+		self.moveEyes()
+		if self.trackingGaze:
+			self.trackGazeWithTarget()
+		
 	def trackGazeWithTarget(self):
 		gaze = self.gazeTracker.getGaze()
 		self.centerChildAt(self.target, gaze)
-		self.target.show()
+		if self.target.isHidden():
+			self.target.show()
 		
 	def moveEyes(self):
 		if self.eyes.ok or True:
@@ -95,14 +103,11 @@ class CalibrationWindow(QtGui.QWidget):
 					dy = y2 - y1
 					
 					distance = sqrt(pow(dx,2) + pow(dy,2))
-					self.eyes.scale = distance * 5
-					
 					rads = atan2(-dy,dx)
 					rads %= 2*pi
 					
-					self.eyes.angle = -degrees(rads)
-					desktopSize = QtGui.QDesktopWidget().screenGeometry()
-					self.centerChildAt(self.eyes, [x*desktopSize.width(), y*desktopSize.height()])
+					self.eyes.setPose(distance * 5, -degrees(rads))
+					self.centerChildAt(self.eyes, [x*self.desktopSize.width(), y*self.desktopSize.height()])
 		
 	def keyPressEvent(self, event):
 		super().keyPressEvent(event)
@@ -124,7 +129,7 @@ class CalibrationWindow(QtGui.QWidget):
 			l.hide()
 		self.pointLabels = []
 		
-		self.gazeTimer.stop()
+		self.trackingGaze = False
 		self.pulseAnimation.setDuration(self.pointCaptureDuration / 3)
 		self.points = points
 		try:
@@ -140,9 +145,8 @@ class CalibrationWindow(QtGui.QWidget):
 		self.animation.finished.connect(self.startPointCaptureSoon)
 		self.animation.setDuration(self.movementTime)
 		if self.points is None:
-			desktopSize = QtGui.QDesktopWidget().screenGeometry()
 			self.centerChildAt(self.target)
-			self.goToPoint(self.gazeTracker.startCalibration(xResolution, yResolution, desktopSize.width(), desktopSize.height()))
+			self.goToPoint(self.gazeTracker.startCalibration(xResolution, yResolution, self.desktopSize.width(), self.desktopSize.height()))
 		else:
 			logging.debug("redo-ing calibration")
 			self.goToPoint(self.gazeTracker.redoCalibration(self.points))
@@ -226,7 +230,7 @@ class CalibrationWindow(QtGui.QWidget):
 		QtGui.QMessageBox.information(self, 'Results', text)
 					
 	def showCalibratedLabels(self, calibration=None):
-		self.gazeTimer.start(1000/30)
+		self.trackingGaze = True
 		if calibration is None:
 			calibration = self.gazeTracker.getCalibration()
 		
@@ -255,12 +259,15 @@ class CalibrationWindow(QtGui.QWidget):
 	def targetScaled(self):
 		self.centerChildAt(self.target)
 		
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		self.desktopSize = QtGui.QDesktopWidget().screenGeometry(self)
+		
 	def closeEvent(self, e):
 		super().closeEvent(e)
 		self.pulseAnimation.stop()
 		self.animation.stop()
-		self.gazeTimer.stop()
-		self.eyeTimer.stop()
+		self.frameTimer.stop()
 		try:
 			self.gazeTracker.endPointCapture()
 		except:
@@ -278,7 +285,7 @@ class TargetWidget(QtGui.QWidget):
 	
 	def setScale(self, scale):
 		self._scale = scale
-		self.repaint()
+		self.update()
 		
 	def paintEvent(self, event):
 		super().paintEvent(event)
@@ -316,36 +323,44 @@ class EyeballWidget(QtGui.QWidget):
 		self._ok = False
 		
 		self.eyePixmaps = {
-			True: QtGui.QPixmap.fromImage(QtGui.QImage('assets/eyes-good.png')),
-			False: QtGui.QPixmap.fromImage(QtGui.QImage('assets/eyes-bad.png'))
+			True: assets.getQPixmap('eyes-good.png'),
+			False: assets.getQPixmap('eyes-bad.png')
 		}
 		
 	def getOpacity(self):
 		return self._opacity
 		
+	# setters only schedule a paint; Qt folds everything changed in one tick into a single update
 	def setOpacity(self, opacity):
-		self._opacity = opacity
+		if opacity != self._opacity:
+			self._opacity = opacity
+			self.update()
 		
 	def getScale(self):
 		return self._scale
 	
 	def setScale(self, scale):
-		self._scale = scale
-		self.repaint()
+		self.setPose(scale, self._angle)
 		
 	def getAngle(self):
 		return self._angle
 	
 	def setAngle(self, angle):
-		self._angle = angle
-		self.repaint()
+		self.setPose(self._scale, angle)
+		
+	def setPose(self, scale, angle):
+		if scale != self._scale or angle != self._angle:
+			self._scale = scale
+			self._angle = angle
+			self.update()
 		
 	def getOk(self):
 		return self._ok
 	
 	def setOk(self, ok):
-		self._ok = ok
-		self.repaint()
+		if ok != self._ok:
+			self._ok = ok
+			self.update()
 		
 	def paintEvent(self, event):
 		super().paintEvent(event)
@@ -1,5 +1,6 @@
 import logging
 import time, random
+from math import sqrt
 import threading, subprocess, signal
 
 from PySide import QtGui, QtCore
@@ -24,6 +25,10 @@ def getGazeDevice():
 		
 	return _instance
 	
+def setGazeDevice(device):
+	global _instance
+	_instance = device
+	
 class EyeTribeServer(QtCore.QObject):
 	outputGenerated = QtCore.Signal(object)
 	error = QtCore.Signal(object)
@@ -39,7 +44,7 @@ class EyeTribeServer(QtCore.QObject):
 		self.stop()
 		
 	def start(self):
-		if not self._running:
+		if self.thread.ident is None:
 			self.thread.start()
 	
 	def stop(self):
@@ -85,6 +90,44 @@ class EyeTribeServer(QtCore.QObject):
 				self._ready = True
 				self.ready.emit()
 
+'''
+	Fixed-size ring buffer of timestamped samples with binary-search lookup
+'''
+class GazeHistory(object):
+	def __init__(self, size=512):
+		self.size = size
+		self.reset()
+		
+	def reset(self):
+		self.times = [0] * self.size
+		self.samples = [None] * self.size
+		self.start = 0
+		self.count = 0
+		
+	def add(self, t, sample):
+		end = (self.start + self.count) % self.size
+		self.times[end] = t
+		self.samples[end] = sample
+		if self.count < self.size:
+			self.count += 1
+		else:
+			self.start = (self.start + 1) % self.size
+			
+	def at(self, t):
+		# latest sample recorded at or before t
+		low, high = 0, self.count
+		while low < high:
+			middle = (low + high) // 2
+			if self.times[(self.start + middle) % self.size] <= t:
+				low = middle + 1
+			else:
+				high = middle
+				
+		if low == 0:
+			return None, None
+		i = (self.start + low - 1) % self.size
+		return self.times[i], self.samples[i]
+
 class _GazeDevice(QtCore.QObject):
 	ready = QtCore.Signal()
 	error = QtCore.Signal(object)
@@ -94,7 +137,7 @@ class _GazeDevice(QtCore.QObject):
 	moved = QtCore.Signal(object)
 	fixated = QtCore.Signal(object)
 
-	def __init__(self):
+	def __init__(self, tracker=None, server=None):
 		super().__init__()
 
 		self.detector = DwellSelect(
@@ -106,24 +149,38 @@ class _GazeDevice(QtCore.QObject):
 		self.staleTimerStart = None
 		self.attentionStalePeriod = float(settings.gazeValue('attentionPeriod'))
 		self.lastFixation = None
+		# fixations from before this have been used up, including those in fixationHistory
+		self.fixationClearTime = None
 		self.sawEyesLastTime = None
 		
+		self.gestureLatency = float(settings.gazeValue('gestureLatency'))
+		self.gazeHistory = GazeHistory()
+		self.fixationHistory = GazeHistory(64)
+		
 		self.timer = QtCore.QTimer()
 		self.timer.setSingleShot(False)
 		self.timer.timeout.connect(self._poll)
 		
 		self.pointStarted = False
 		
-		self.tracker = EyeTribe()
-		self.server = EyeTribeServer()
+		import DeviceWarmup
+		self.tracker = tracker or EyeTribe()
+		self._trackerConnected = False
+		self.server = server or DeviceWarmup.getEyeTribeServer() or EyeTribeServer()
 		self.server.ready.connect(self.connectToServer)
 		self.server.error.connect(self.error.emit)
 #		self.tracker.pullmode()
 		self.server.start()
 		self.isReady = self.server.isReady
+		if self.server.isReady():
+			# warmed up before we got here, so its ready signal has already gone out
+			self.connectToServer()
 
 	def connectToServer(self):
+		if self._trackerConnected:
+			return
 		logging.debug("Eyetribe server ready - connecting tracker!")
+		self._trackerConnected = True
 		self.tracker.connect()
 		self.ready.emit()
 		
@@ -148,6 +205,13 @@ class _GazeDevice(QtCore.QObject):
 	def getAttentionStalePeriod(self):
 		return self.attentionStalePeriod
 		
+	def setGestureLatency(self, latency):
+		self.gestureLatency = latency
+		settings.setGazeValue('gestureLatency', latency)
+		
+	def getGestureLatency(self):
+		return self.gestureLatency
+		
 	def isRunning(self):
 		return self.timer.isActive()
 		
@@ -179,6 +243,7 @@ class _GazeDevice(QtCore.QObject):
 					self.sawEyesLastTime = True
 						
 					currentTime = time.time()
+					self.gazeHistory.add(currentTime, self.gazePosition)
 					wasInsideDwell = self.detector.inDwell					
 					self.detector.addPoint(Point(
 						gazeFrame.avg.x,
@@ -189,6 +254,7 @@ class _GazeDevice(QtCore.QObject):
 					))
 					if self.detector.selection != None:
 						self.lastFixation = self.detector.clearSelection()
+						self.fixationHistory.add(currentTime, self.lastFixation)
 						self.fixated.emit(self.lastFixation)
 						
 					if wasInsideDwell and not self.detector.inDwell:
@@ -217,17 +283,37 @@ class _GazeDevice(QtCore.QObject):
 				gaze = [self.lastFixation.x, self.lastFixation.y]
 				
 		if clear:
-			self.lastFixation = None
+			self.clearLastFixation()
 			
 		return gaze
 			
+	def getAttentiveGazeAt(self, t):
+		sampleTime, gaze = self.gazeHistory.at(t)
+		if gaze is None:
+			return self.getAttentiveGaze()
+			
+		fixationTime, fixation = self.fixationHistory.at(t)
+		if fixation is not None and (self.fixationClearTime is None or fixationTime > self.fixationClearTime):
+			stillThere = sqrt((gaze[0] - fixation.x)**2 + (gaze[1] - fixation.y)**2) <= self.detector.range
+			if stillThere or t - fixationTime < self.attentionStalePeriod:
+				return [fixation.x, fixation.y]
+				
+		return gaze
+		
+	def getGestureTimeGaze(self):
+		# where the user was looking when the hand started moving
+		return self.getAttentiveGazeAt(time.time() - self.gestureLatency)
+			
 	def clearLastFixation(self):
 		self.lastFixation = None
+		self.fixationClearTime = time.time()
 		self.staleTimeStart = None
 
 	def reset(self):
 		self.clearLastFixation()
 		self.detector.reset()
+		self.gazeHistory.reset()
+		self.fixationHistory.reset()
 
 	def getEyePositions(self):
 		return self.eyePositions
@@ -280,6 +366,11 @@ class _GazeDevice(QtCore.QObject):
 	def getCalibration(self):
 		return self.tracker.latest_calibration_result()
 		
+	def pause(self):
+		# between trials: stop polling but keep the server and tracker connection up
+		self.timer.stop()
+		self.reset()
+		
 	def stop(self):
 		self.timer.stop()
 		try:
@@ -1,4 +1,5 @@
 import logging, settings, time, math
+from collections import deque
 from PySide import QtGui, QtCore
 
 import LeapPython
@@ -6,6 +7,8 @@ import Leap
 from Leap import CircleGesture, KeyTapGesture, ScreenTapGesture, SwipeGesture
 
 from selectionDetector import DwellSelect, Point
+import TransferFunction
+from HandRecording import HandRecordingWriter
 
 class GestureDevice(QtCore.QObject):
 	handAppeared = QtCore.Signal(object)
@@ -24,19 +27,26 @@ class GestureDevice(QtCore.QObject):
 	
 	def __init__(self):
 		super().__init__()
-		self.controller = Leap.Controller()
+		import DeviceWarmup
+		self.controller = DeviceWarmup.getLeapController() or Leap.Controller()
 		self.controller.set_policy_flags(Leap.Controller.POLICY_BACKGROUND_FRAMES);
+		self.lastFrame = None
 		
 		self.calibrating = False
 		
 		self.prescale = float(settings.gestureValue('prescale'))
 		self.acceleration = float(settings.gestureValue('acceleration'))
+		self.transferCurve = settings.gestureValue('transferCurve')
+		self.transferFunction = TransferFunction.TransferFunction(self._buildCurve())
 		self.minGrab = float(settings.gestureValue('minGrab'))
 		self.maxGrab = float(settings.gestureValue('maxGrab'))
 		
 		self.grabThreshold = float(settings.gestureValue('grabThreshold'))
 		self.releaseThreshold = float(settings.gestureValue('releaseThreshold'))
 		
+		self.predictGrab = settings.checkBool(settings.gestureValue('predictGrab'))
+		self.grabPredictionConfidence = float(settings.gestureValue('grabPredictionConfidence'))
+		
 		self.pinchThreshold = 0.85
 		self.unpinchThreshold = 0.70
 		
@@ -51,6 +61,8 @@ class GestureDevice(QtCore.QObject):
 		self.rightHand.fixated.connect(self.fixated.emit)
 		self.rightHand.fixationInvalidated.connect(self.fixationInvalidated.emit)
 		
+		self.setSelectionMode(settings.gestureValue('selectionMode'))
+		
 		self.listening = True
 		self.timer = QtCore.QTimer()
 		self.timer.setSingleShot(False)
@@ -59,6 +71,9 @@ class GestureDevice(QtCore.QObject):
 		
 		self.sawHandLastTime = False
 		
+		self.recording = None
+		self._startConfiguredRecording()
+		
 		self.boundsReached = {
 			'left': False,
 			'right': False,
@@ -68,6 +83,11 @@ class GestureDevice(QtCore.QObject):
     
 	def poll(self):
 		frame = self.controller.frame()
+		if self.selectionMode != 'threshold':
+			self._pollNativeGestures(frame)
+		# the timer polls far faster than the Leap produces frames
+		newFrame = self.lastFrame is None or frame.id != self.lastFrame.id
+		self.lastFrame = frame
 		hands = frame.hands
 		numHands = len(hands)
 		
@@ -87,6 +107,8 @@ class GestureDevice(QtCore.QObject):
 				# check for edges
 				box = frame.interaction_box
 				pos = box.normalize_point(hand.palm_position, False)
+				if self.recording is not None:
+					self.recording.write(frame, hand, pos)
 				if pos.x > self.warnThreshold:
 					boundsCheck['right'] = True
 				elif pos.x < 1 - self.warnThreshold:
@@ -136,13 +158,15 @@ class GestureDevice(QtCore.QObject):
 						grabStrength = (self.maxGrab - hand.sphere_radius) / (self.maxGrab - self.minGrab)
 						self.grabValued.emit(grabStrength)
 						self.pinchValued.emit(hand.pinch_strength)
-						if not metaHand.grabbing:
-							if grabStrength >= self.grabThreshold / 100.0:
-								metaHand.grabbing = True
+						if newFrame:
+							# repeats of a frame would read as flat steps and sink the prediction confidence
+							metaHand.grabPredictor.addSample(grabStrength, frame.timestamp / 1000000.0)
+						if self.selectionMode == 'threshold':
+							confidence = self.grabPredictionConfidence if self.predictGrab else None
+							change = metaHand.updateGrab(grabStrength, self.grabThreshold / 100.0, self.releaseThreshold / 100.0, confidence)
+							if change == 'grabbed':
 								self.grabbed.emit(hand)
-						else:
-							if grabStrength <= self.releaseThreshold / 100.0:
-								metaHand.grabbing = False
+							elif change == 'released':
 								self.released.emit(hand)
 								
 						if not metaHand.pinching:
@@ -159,19 +183,7 @@ class GestureDevice(QtCore.QObject):
 						if delta is not None and (delta[0]!=0 or delta[1]!=0 or delta[2]!=0): #if any of these are nonzero
 							#print('%s' % delta)
 							for index, param in enumerate(delta):
-								# absolute value first, otherwise you may end up with a complex number
-								negative = param < 0
-								param = abs(param)
-								
-								if param > 4:
-									param = 0
-								elif param > 2.5:
-									param = 2.5
-									
-								delta[index] = abs(pow(param * self.prescale, self.acceleration))
-								
-								if negative:
-									delta[index] *= -1
+								delta[index] = self.transferFunction.map(param)
 							self.moved.emit(delta)
 					
 			for direction,warn in boundsCheck.items():
@@ -179,6 +191,65 @@ class GestureDevice(QtCore.QObject):
 					self.boundsReached[direction] = warn
 					self.reachingBounds.emit(direction, warn)
 
+	def _pollNativeGestures(self, frame):
+		if self.lastFrame is None:
+			gestures = frame.gestures()
+		else:
+			# includes gestures from frames we skipped between polls
+			gestures = frame.gestures(self.lastFrame)
+
+		for gesture in gestures:
+			if gesture.type != self.nativeGestureType or gesture.state != Leap.Gesture.STATE_STOP:
+				continue
+
+			hand = None
+			if not gesture.hands.is_empty:
+				hand = gesture.hands[0]
+			if hand is not None and hand.is_left:
+				metaHand = self.leftHand
+			elif hand is not None or self.rightHand.hand is not None:
+				metaHand = self.rightHand
+			else:
+				metaHand = self.leftHand
+
+			if hand is None:
+				hand = metaHand.hand
+
+			# taps are discrete, so each one toggles between grabbed and released
+			metaHand.grabbing = not metaHand.grabbing
+			logging.debug('Native %s gesture after %dus' % (self.selectionMode, gesture.duration))
+			if metaHand.grabbing:
+				self.grabbed.emit(hand)
+			else:
+				self.released.emit(hand)
+
+	def _buildCurve(self):
+		if self.transferCurve == 'sigmoid':
+			# saturate at the same top speed the power curve would reach
+			return TransferFunction.SigmoidCurve(
+				TransferFunction.PowerCurve(self.prescale, self.acceleration)(2.5),
+				float(settings.gestureValue('sigmoidMidpoint')),
+				float(settings.gestureValue('sigmoidSteepness'))
+			)
+		elif self.transferCurve in ['piecewise', 'fitted']:
+			try:
+				points = TransferFunction.parsePoints(settings.gestureValue('transferPoints'))
+				if self.transferCurve == 'piecewise':
+					curve = TransferFunction.PiecewiseLinearCurve(points)
+				else:
+					curve = TransferFunction.FittedCurve(points)
+				# the table is sampled from 0, so catch curves that can't be evaluated there now
+				curve(0)
+				curve(2.5)
+				return curve
+			except Exception as exc:
+				logging.warning('Could not build %s transfer curve, using power curve: %s' % (self.transferCurve, exc))
+
+		return TransferFunction.PowerCurve(self.prescale, self.acceleration)
+
+	def _rebuildTransferFunction(self):
+		self.transferFunction.setCurve(self._buildCurve())
+
 	def toggleCalibration(self):
 		self.setCalibrating(not self.calibrating)
 		
@@ -212,6 +283,15 @@ class GestureDevice(QtCore.QObject):
 	def getAcceleration(self):
 		return self.acceleration
 		
+	def getTransferCurve(self):
+		return self.transferCurve
+		
+	def getPredictGrab(self):
+		return self.predictGrab
+		
+	def getGrabPredictionConfidence(self):
+		return self.grabPredictionConfidence
+		
 	def getDwellDuration(self):
 		return self.leftHand.getDwellDuration()
 		
@@ -235,13 +315,69 @@ class GestureDevice(QtCore.QObject):
 		self.releaseThreshold = threshold
 		settings.setGestureValue('releaseThreshold', threshold)
 
+	def getSelectionMode(self):
+		return self.selectionMode
+		
+	def setSelectionMode(self, mode):
+		gestureTypes = {
+			'keyTap': Leap.Gesture.TYPE_KEY_TAP,
+			'screenTap': Leap.Gesture.TYPE_SCREEN_TAP,
+		}
+		for gestureType in gestureTypes.values():
+			self.controller.enable_gesture(gestureType, False)
+
+		if mode in gestureTypes:
+			self.nativeGestureType = gestureTypes[mode]
+			self.controller.enable_gesture(self.nativeGestureType)
+
+			velocity = float(settings.gestureValue('tapMinVelocity'))
+			history = float(settings.gestureValue('tapHistory'))
+			config = self.controller.config
+			if mode == 'keyTap':
+				config.set('Gesture.KeyTap.MinDownVelocity', velocity)
+				config.set('Gesture.KeyTap.HistorySeconds', history)
+			else:
+				config.set('Gesture.ScreenTap.MinForwardVelocity', velocity)
+				config.set('Gesture.ScreenTap.HistorySeconds', history)
+			config.save()
+		else:
+			mode = 'threshold'
+			self.nativeGestureType = None
+
+		self.leftHand.setGrabbing(False)
+		self.rightHand.setGrabbing(False)
+		self.selectionMode = mode
+		settings.setGestureValue('selectionMode', mode)
+		
+	def setPredictGrab(self, predictGrab):
+		self.predictGrab = predictGrab
+		settings.setGestureValue('predictGrab', predictGrab)
+
+	def setGrabPredictionConfidence(self, confidence):
+		self.grabPredictionConfidence = confidence
+		settings.setGestureValue('grabPredictionConfidence', confidence)
+
 	def setPrescale(self, prescale):
 		self.prescale = prescale
 		settings.setGestureValue('prescale', prescale)
+		self._rebuildTransferFunction()
 		
 	def setAcceleration(self, acceleration):
 		self.acceleration = acceleration
 		settings.setGestureValue('acceleration', acceleration)
+		self._rebuildTransferFunction()
+		
+	def setTransferCurve(self, curve):
+		self.transferCurve = curve
+		settings.setGestureValue('transferCurve', curve)
+		self._rebuildTransferFunction()
+		
+	def getTransferPoints(self):
+		return settings.gestureValue('transferPoints')
+		
+	def setTransferPoints(self, points):
+		settings.setGestureValue('transferPoints', points)
+		self._rebuildTransferFunction()
 		
 	def setDwellDuration(self, duration):
 		self.leftHand.setDwellDuration(duration)
@@ -293,8 +429,34 @@ class GestureDevice(QtCore.QObject):
 		
 		return whichIsLater(left, right)
 
+	def startRecording(self, path):
+		self.stopRecording()
+		self.recording = HandRecordingWriter(path)
+		logging.info('Recording hands to %s' % path)
+
+	def stopRecording(self):
+		if self.recording is not None:
+			self.recording.close()
+			self.recording = None
+
+	def _startConfiguredRecording(self):
+		if self.recording is None and settings.checkBool(settings.gestureValue('recordHands')):
+			self.startRecording('logs/%s/%d-hands.bin' % (settings.systemValue('participantID'), int(time.time())))
+
+	def pause(self):
+		# between trials: stop polling but keep the Leap connection
+		self.timer.stop()
+		self.stopRecording()
+		self.clearLastFixation()
+
+	def resume(self):
+		if not self.timer.isActive():
+			self.timer.start()
+		self._startConfiguredRecording()
+
 	def stop(self):
 		self.timer.stop()
+		self.stopRecording()
 
 class HandyHand(QtCore.QObject):
 	fixated = QtCore.Signal(object)
@@ -304,6 +466,8 @@ class HandyHand(QtCore.QObject):
 		super().__init__()
 		self.hand = None
 		self.grabbing = False
+		# strength a predicted grab/release fired at, until the threshold is actually crossed
+		self.predictedAt = None
 		self.pinching = False
 		self.rawPositionHistory = [[], [], []]
 
@@ -321,11 +485,52 @@ class HandyHand(QtCore.QObject):
 			float(settings.gestureValue('dwellRange'))
 		)
 		
+		self.grabPredictor = GrabPredictor(
+			float(settings.gestureValue('grabPredictionWindow')),
+			float(settings.gestureValue('grabPredictionLead'))
+		)
+		
+	def setGrabbing(self, grabbing):
+		self.grabbing = grabbing
+		self.predictedAt = None
+		
+	'''
+		Threshold grab/release with optional prediction (confidence None turns it off).
+		Returns 'grabbed', 'released' or None.
+		
+		A predicted grab fires while the strength is still below the grab
+		threshold, possibly below the release threshold too, so the plain
+		release test waits until the grab threshold is really crossed or the
+		strength falls back below where the prediction fired; a release can
+		still be predicted from a falling trend. Predicted releases mirror this.
+	'''
+	def updateGrab(self, strength, grabThreshold, releaseThreshold, confidence=None):
+		if not self.grabbing:
+			if self.predictedAt is not None and (strength <= releaseThreshold or strength > self.predictedAt):
+				self.predictedAt = None
+			crossed = strength >= grabThreshold and self.predictedAt is None
+			if crossed or (confidence is not None and self.grabPredictor.predictsCrossing(grabThreshold, True, confidence)):
+				self.grabbing = True
+				self.predictedAt = None if strength >= grabThreshold else strength
+				self.grabPredictor.reset()
+				return 'grabbed'
+		else:
+			if self.predictedAt is not None and (strength >= grabThreshold or strength < self.predictedAt):
+				self.predictedAt = None
+			crossed = strength <= releaseThreshold and self.predictedAt is None
+			if crossed or (confidence is not None and self.grabPredictor.predictsCrossing(releaseThreshold, False, confidence)):
+				self.grabbing = False
+				self.predictedAt = None if strength <= releaseThreshold else strength
+				self.grabPredictor.reset()
+				return 'released'
+		return None
+		
 	def setHand(self, hand):
 		if self.hand is None or hand is None or self.hand.id != hand.id:
 			self.hand = hand
 			for i in range(3):
 				self.rawPositionHistory[i] = []
+			self.grabPredictor.reset()
 				
 			self.updatePosition()
 		else:
@@ -430,6 +635,63 @@ class HandyHand(QtCore.QObject):
 			
 		return position
 
+'''
+	Extrapolates grab strength from its rate of change over a short window so
+	grabs and releases can fire before the threshold is actually crossed.
+'''
+class GrabPredictor(object):
+	def __init__(self, window, lead):
+		self.window = window
+		self.lead = lead
+		self.samples = deque()
+		
+	def reset(self):
+		self.samples.clear()
+		
+	def addSample(self, strength, t):
+		self.samples.append((t, strength))
+		while len(self.samples) > 0 and t - self.samples[0][0] > self.window:
+			self.samples.popleft()
+			
+	def getVelocity(self):
+		if len(self.samples) < 3:
+			return None
+			
+		meanT = sum(s[0] for s in self.samples) / len(self.samples)
+		meanS = sum(s[1] for s in self.samples) / len(self.samples)
+		variance = sum((s[0] - meanT)**2 for s in self.samples)
+		if variance == 0:
+			return None
+		return sum((s[0] - meanT) * (s[1] - meanS) for s in self.samples) / variance
+		
+	def getConfidence(self, closing):
+		# fraction of steps in the window that agree with the direction of travel
+		steps = 0
+		agreeing = 0
+		previous = None
+		for t, strength in self.samples:
+			if previous is not None:
+				steps += 1
+				if (strength > previous) == closing and strength != previous:
+					agreeing += 1
+			previous = strength
+		if steps == 0:
+			return 0
+		return agreeing / steps
+		
+	def predictsCrossing(self, threshold, closing, minimumConfidence):
+		velocity = self.getVelocity()
+		if velocity is None or (velocity > 0) != closing:
+			return False
+		if self.getConfidence(closing) < minimumConfidence:
+			return False
+			
+		predicted = self.samples[-1][1] + velocity * self.lead
+		if closing:
+			return predicted >= threshold
+		else:
+			return predicted <= threshold
+
 def whichIsLater(left, right):
 	if left is None and right is None:
 		return None
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+'''
+	A lighter board for large stimulus sets. Each icon is one QGraphicsItem
+	in a QGraphicsScene instead of a widget with its own layout and labels;
+	the scene's BSP tree answers hit tests and the view only paints the items
+	that are exposed. Selected with the 'boardView' system setting.
+'''
+
+from PySide import QtGui, QtCore
+
+import assets
+from DragDropUI import imageSize, folderSize, thumbnailSize, repaintCounts
+
+cellSize = (225, 250)
+margin = 10
+
+class BoardItem(QtGui.QGraphicsItem):
+	isFolder = False
+	
+	def __init__(self, imagePath, text, size=imageSize):
+		super().__init__()
+		self.imagePath = imagePath
+		self.text = text
+		self.label = '' if text[0] == '.' else text
+		self.size = size
+		self.hovered = False
+		self.selected = False
+		
+		self.pixmap = assets.getPlaceholder(size)
+		assets.loadQPixmap(imagePath, size, self.setPixmap)
+		assets.loadQPixmap(imagePath, thumbnailSize)
+		
+	def setPixmap(self, pixmap):
+		self.pixmap = pixmap
+		self.update()
+		
+	def boundingRect(self):
+		return QtCore.QRectF(0, 0, cellSize[0], cellSize[1])
+		
+	def imageRect(self):
+		return QtCore.QRect((cellSize[0] - self.size[0]) // 2, margin, self.size[0], self.size[1])
+		
+	def labelRect(self):
+		top = margin + self.size[1]
+		return QtCore.QRect(0, top, cellSize[0], cellSize[1] - top)
+		
+	def paint(self, painter, option, widget=None):
+		repaintCounts['item'] += 1
+		painter.drawPixmap(self.imageRect(), self.pixmap)
+		if self.label != '':
+			painter.drawText(self.labelRect(), QtCore.Qt.AlignCenter, self.label)
+			
+		if self.selected or self.hovered:
+			bg = QtGui.QColor(QtCore.Qt.darkGreen)
+			bg.setAlpha(128 if self.selected else 48)
+			painter.fillRect(self.boundingRect(), bg)
+			
+	def setUnhovered(self):
+		self.setHovered(False)
+		
+	def setHovered(self, enabled=True):
+		if self.hovered != enabled:
+			self.hovered = enabled
+			self.update()
+			
+	def setUnselected(self):
+		self.setSelected(False)
+		
+	def setSelected(self, enabled=True):
+		if self.selected != enabled:
+			self.selected = enabled
+			self.update()
+			
+	def blink(self):
+		self.setSelected(True)
+		QtCore.QTimer.singleShot(500, self.setUnselected)
+		
+	def getThumbnail(self):
+		return assets.getQPixmap(self.imagePath, thumbnailSize)
+		
+	def globalCenter(self):
+		view = self.scene().views()[0]
+		center = view.viewport().mapToGlobal(view.mapFromScene(self.sceneBoundingRect().center()))
+		return [center.x(), center.y()]
+		
+class FolderItem(BoardItem):
+	isFolder = True
+	
+	# folder names are written across the folder, as FolderIcon stacks them
+	def labelRect(self):
+		return self.imageRect()
+		
+class BoardView(QtGui.QGraphicsView):
+	def __init__(self, board):
+		super().__init__()
+		self.board = board
+		self.icons = {}
+		self.slots = []
+		self.columns = 0
+		
+		self.setScene(QtGui.QGraphicsScene(self))
+		self.scene().setItemIndexMethod(QtGui.QGraphicsScene.BspTreeIndex)
+		self.setViewportUpdateMode(QtGui.QGraphicsView.MinimalViewportUpdate)
+		self.setOptimizationFlags(QtGui.QGraphicsView.DontSavePainterState | QtGui.QGraphicsView.DontAdjustForAntialiasing)
+		self.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+		self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+		
+		self.initItems()
+		
+	def initItems(self):
+		pass
+		
+	def addIcon(self, name, item):
+		self.icons[name] = item
+		self.slots.append(item)
+		self.scene().addItem(item)
+		
+	# flows the icons into as many columns as fit, like FlowLayout
+	def layoutItems(self):
+		columns = max(1, self.viewport().width() // cellSize[0])
+		if columns == self.columns:
+			return
+		self.columns = columns
+		
+		for i, item in enumerate(self.slots):
+			if item is not None:
+				item.setPos((i % columns) * cellSize[0], (i // columns) * cellSize[1])
+		rows = (len(self.slots) + columns - 1) // columns
+		self.setSceneRect(0, 0, columns * cellSize[0], rows * cellSize[1])
+		
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		self.layoutItems()
+		
+	def iconAt(self, x, y):
+		point = self.viewport().mapFromGlobal(QtCore.QPoint(int(x), int(y)))
+		if not self.viewport().rect().contains(point):
+			return None
+		return self.itemAt(point)
+		
+	def ensureIconVisible(self, icon):
+		self.ensureVisible(icon)
+		
+	# the task window handles the mouse, as it does for the widget board
+	def mousePressEvent(self, event):
+		event.ignore()
+		
+	def mouseReleaseEvent(self, event):
+		event.ignore()
+		
+	def mouseMoveEvent(self, event):
+		event.ignore()
+		
+class ImagesView(BoardView):
+	def initItems(self):
+		self.slotOf = {}
+		for imageName in self.board.images:
+			self.slotOf[imageName] = len(self.slots)
+			self.addIcon(imageName, BoardItem('animals/%s' % imageName, imageName))
+		self.board.imageMoved.connect(self.imageMoved)
+		
+	def imageMoved(self, imageName, folderName):
+		# the slot stays empty so the rest of the board doesn't shift
+		item = self.icons.pop(imageName)
+		self.slots[self.slotOf.pop(imageName)] = None
+		self.scene().removeItem(item)
+		
+	def getRemainingImageCount(self):
+		return self.board.getRemainingImageCount()
+		
+class FoldersView(BoardView):
+	def initItems(self):
+		for folderName in self.board.folders:
+			self.addIcon(folderName, FolderItem('folder.png', folderName, folderSize))
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+'''
+	Compact binary recordings of Leap hand samples
+
+	File layout (all little-endian):
+		header   magic, version, record size, record count, index offset, index count
+		records  one fixed-size record per processed hand sample
+		index    (frame id, first record number) per frame, in frame order
+
+	Fixed-size records and the trailing index mean a recording can be mmap'd
+	and any frame found with a binary search instead of parsing the file.
+'''
+
+import mmap, struct
+from collections import namedtuple
+
+MAGIC = b'NISHANDS'
+VERSION = 1
+
+_header = struct.Struct('<8sIIQQQ')
+_record = struct.Struct('<qqiBxxx3f3fff3f')
+_indexEntry = struct.Struct('<qq')
+
+HandRecord = namedtuple('HandRecord', [
+	'frameID', 'timestamp', 'handID', 'isLeft',
+	'palmX', 'palmY', 'palmZ',
+	'stabilizedX', 'stabilizedY', 'stabilizedZ',
+	'sphereRadius', 'pinchStrength',
+	'normalizedX', 'normalizedY', 'normalizedZ',
+])
+
+class HandRecordingWriter(object):
+	def __init__(self, path):
+		self.path = path
+		self.file = open(path, 'wb')
+		self.file.write(_header.pack(MAGIC, VERSION, _record.size, 0, 0, 0))
+		self.recordCount = 0
+		self.index = []
+		self.lastFrameID = None
+		self.handsInFrame = set()
+
+	def write(self, frame, hand, normalizedPosition):
+		if frame.id != self.lastFrameID:
+			self.index.append((frame.id, self.recordCount))
+			self.lastFrameID = frame.id
+			self.handsInFrame = set()
+		elif hand.id in self.handsInFrame:
+			# the device is polled faster than frames arrive; each hand is recorded once per frame
+			return
+		self.handsInFrame.add(hand.id)
+
+		palm = hand.palm_position
+		stabilized = hand.stabilized_palm_position
+		self.file.write(_record.pack(
+			frame.id, frame.timestamp, hand.id, 1 if hand.is_left else 0,
+			palm.x, palm.y, palm.z,
+			stabilized.x, stabilized.y, stabilized.z,
+			hand.sphere_radius, hand.pinch_strength,
+			normalizedPosition.x, normalizedPosition.y, normalizedPosition.z
+		))
+		self.recordCount += 1
+
+	def close(self):
+		if self.file is None:
+			return
+
+		indexOffset = self.file.tell()
+		for entry in self.index:
+			self.file.write(_indexEntry.pack(*entry))
+
+		self.file.seek(0)
+		self.file.write(_header.pack(MAGIC, VERSION, _record.size, self.recordCount, indexOffset, len(self.index)))
+		self.file.close()
+		self.file = None
+
+class HandRecordingReader(object):
+	def __init__(self, path):
+		self.file = open(path, 'rb')
+		self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic, version, recordSize, self.recordCount, self.indexOffset, self.indexCount = _header.unpack_from(self.buffer, 0)
+		if magic != MAGIC or version != VERSION or recordSize != _record.size:
+			self.close()
+			raise ValueError('%s is not a hand recording this version can read' % path)
+
+	def __len__(self):
+		return self.recordCount
+
+	def __getitem__(self, i):
+		if i < 0:
+			i += self.recordCount
+		if i < 0 or i >= self.recordCount:
+			raise IndexError('record %d out of range' % i)
+		return self._record(i)
+
+	def _record(self, i):
+		values = list(_record.unpack_from(self.buffer, _header.size + i * _record.size))
+		values[3] = values[3] == 1
+		return HandRecord(*values)
+
+	def _indexAt(self, i):
+		return _indexEntry.unpack_from(self.buffer, self.indexOffset + i * _indexEntry.size)
+
+	def frameCount(self):
+		return self.indexCount
+
+	def frameAt(self, i):
+		frameID, first = self._indexAt(i)
+		if i + 1 < self.indexCount:
+			last = self._indexAt(i + 1)[1]
+		else:
+			last = self.recordCount
+		return [ self._record(r) for r in range(first, last) ]
+
+	def findFrame(self, frameID):
+		low, high = 0, self.indexCount
+		while low < high:
+			middle = (low + high) // 2
+			if self._indexAt(middle)[0] < frameID:
+				low = middle + 1
+			else:
+				high = middle
+
+		if low < self.indexCount and self._indexAt(low)[0] == frameID:
+			return self.frameAt(low)
+		return None
+
+	def frames(self):
+		for i in range(self.indexCount):
+			yield self.frameAt(i)
+
+	def close(self):
+		self.buffer.close()
+		self.file.close()
+
+'''
+	Turns a recording into a trajectory the fake Leap controller can replay
+'''
+def loadTrajectory(path, frameRate, loop=False):
+	import Leap
+	reader = HandRecordingReader(path)
+	try:
+		frames = []
+		for records in reader.frames():
+			frames.append([ Leap.HandSample(
+				r.handID, r.isLeft,
+				r.palmX, r.palmY, r.palmZ,
+				r.sphereRadius, r.pinchStrength,
+				Leap.Vector(r.stabilizedX, r.stabilizedY, r.stabilizedZ)
+			) for r in records ])
+	finally:
+		reader.close()
+	return Leap.RecordedTrajectory(frames, frameRate, loop)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+'''
+	Uniform-grid index of icon rectangles in global (screen) coordinates, so
+	hover and drop lookups don't have to walk Qt's widget tree
+'''
+
+from PySide import QtGui, QtCore
+
+class IconIndex(QtCore.QObject):
+	def __init__(self, root, iconType, cellSize=128):
+		super().__init__()
+		self.root = root
+		self.iconType = iconType
+		self.cellSize = cellSize
+		self.cells = {}
+		self.dirty = True
+		self.rebuildCount = 0
+
+	def invalidate(self, *args):
+		self.dirty = True
+
+	def rebuild(self):
+		self.cells = {}
+		for icon in self.root.findChildren(self.iconType):
+			if not icon.isVisible():
+				continue
+
+			topLeft = icon.mapToGlobal(QtCore.QPoint(0, 0))
+			rect = QtCore.QRect(topLeft, icon.size())
+
+			# icons scrolled out of view can't be hit
+			scrollArea = self._scrollAreaOf(icon)
+			if scrollArea is not None:
+				viewport = scrollArea.viewport()
+				rect = rect.intersected(QtCore.QRect(viewport.mapToGlobal(QtCore.QPoint(0, 0)), viewport.size()))
+				if rect.isEmpty():
+					continue
+
+			bounds = (rect.left(), rect.top(), rect.right(), rect.bottom())
+			for cx in range(bounds[0] // self.cellSize, bounds[2] // self.cellSize + 1):
+				for cy in range(bounds[1] // self.cellSize, bounds[3] // self.cellSize + 1):
+					self.cells.setdefault((cx, cy), []).append((bounds, icon))
+
+		self.dirty = False
+		self.rebuildCount += 1
+
+	def _scrollAreaOf(self, widget):
+		widget = widget.parentWidget()
+		while widget is not None:
+			if isinstance(widget, QtGui.QAbstractScrollArea):
+				return widget
+			widget = widget.parentWidget()
+		return None
+
+	def iconAt(self, x, y):
+		if self.dirty:
+			self.rebuild()
+
+		x, y = int(x), int(y)
+		for bounds, icon in self.cells.get((x // self.cellSize, y // self.cellSize), []):
+			if bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3]:
+				return icon
+		return None
@@ -1,55 +1,149 @@
-from functools import partial
 import time, logging
 
 from PySide import QtGui, QtCore
 
-from DragDropUI import IconLayout, FolderIcon
-from pymouse import PyMouse
+from DragDropUI import IconLayout
+from SchemeSelector import SchemeSelector
 
 import settings, assets
 
-pyMouse = PyMouse()
+'''
+	Creates the PyMouse connection on first use rather than at import time
+'''
+class LazyPyMouse(object):
+	def __init__(self):
+		self.mouse = None
+		
+	def __getattr__(self, name):
+		if self.mouse is None:
+			from pymouse import PyMouse
+			self.mouse = PyMouse()
+		return getattr(self.mouse, name)
+
+pyMouse = LazyPyMouse()
 
 def clamp(number, minimum, maximum):
 	return max(min(number, maximum), minimum)
+	
+'''
+	Number of connected receivers for each signal an object declares, for
+	spotting handlers that pile up across trials
+'''
+def countReceivers(obj):
+	counts = {}
+	metaObject = obj.metaObject()
+	for i in range(metaObject.methodOffset(), metaObject.methodCount()):
+		method = metaObject.method(i)
+		if method.methodType() == QtCore.QMetaMethod.Signal:
+			signature = method.signature()
+			counts[signature.split('(')[0]] = obj.receivers(QtCore.SIGNAL(signature))
+	return counts
 
 class InputScheme(QtCore.QObject):
 	imageMoved = QtCore.Signal(str, str)
 	ready = QtCore.Signal()
 	error = QtCore.Signal(object)
+	drawsCursor = True
 	
 	def __init__(self, window=None):
 		super().__init__()
 		self.grabbedIcons = []
+		self.useOverlay = settings.checkBool(settings.systemValue('overlayCursor'))
+		self.running = False
+		self.connections = []
 		self.setWindow(window)
 		self._ready = False
 		
 		self.preselectedIcon = None
 		
 	def changePreselectedIcon(self, pos):
+		icon = self.findWidgetAt(pos[0], pos[1])
+		if icon is not None and not hasattr(icon, 'setHovered'):
+			icon = None
+		# most samples land on the icon that is already highlighted
+		if icon is self.preselectedIcon:
+			return
+			
 		if self.preselectedIcon is not None and hasattr(self.preselectedIcon, 'setUnhovered'):
 			self.preselectedIcon.setUnhovered()
-			
-		icon = self.findWidgetAt(pos[0], pos[1])
-		if icon is not None and hasattr(icon, 'setHovered'):
-			self.preselectedIcon = icon
-			self.preselectedIcon.setHovered()
-		else:
-			self.preselectedIcon = None
+		self.preselectedIcon = icon
+		if icon is not None:
+			icon.setHovered()
 	
 	def isReady(self):
 		return self._ready
 		
 	def start(self):
-		pass
+		self.running = True
 
+	# ends a trial; devices stay connected so the scheme can be started again
 	def stop(self):
-		pass
+		self.running = False
+		self.disconnectSignals()
+		self.resetTrialState()
+		
+	# the next trial's board is new, so nothing may point into this one
+	def resetTrialState(self):
+		self.preselectedIcon = None
+		self.grabbedIcons = []
+		
+	# releases the devices for good
+	def shutdown(self):
+		self.stop()
+		self.disconnectSignals(persistent=True)
+		
+	'''
+		Connections made through here are undone by stop(), or by shutdown()
+		for persistent ones, so handlers don't pile up on the shared devices
+	'''
+	def connectSignal(self, signal, slot, persistent=False):
+		signal.connect(slot)
+		self.connections.append((signal, slot, persistent))
+		
+	def disconnectSignals(self, persistent=False):
+		kept = []
+		for signal, slot, isPersistent in self.connections:
+			if isPersistent and not persistent:
+				kept.append((signal, slot, isPersistent))
+				continue
+			try:
+				signal.disconnect(slot)
+			except RuntimeError:
+				# the sender has been deleted, and its connections with it
+				pass
+		self.connections = kept
+		
+	def getDevices(self):
+		return [ getattr(self, name) for name in ['gazeTracker', 'gestureTracker'] if hasattr(self, name) ]
+		
+	def logReceiverCounts(self):
+		if not logging.getLogger().isEnabledFor(logging.DEBUG):
+			return
+		for device in self.getDevices():
+			logging.debug('%s receivers: %s' % (type(device).__name__, countReceivers(device)))
 		
 	def setWindow(self, window=None):
 		self.window = window
+		overlay = self.getOverlay()
+		if overlay is not None:
+			overlay.setCursorVisible(self.drawsCursor)
+		
+	def getOverlay(self):
+		if self.window is not None and self.useOverlay:
+			return self.window.cursorOverlay
+		return None
+		
+	def moveCursor(self, x, y):
+		overlay = self.getOverlay()
+		if overlay is not None:
+			overlay.setCursorPosition(x, y)
+		else:
+			pyMouse.move(int(x), int(y))
 		
 	def findWidgetAt(self, x, y):
+		if self.window is not None:
+			return self.window.iconAt(x, y)
+		
 		widget = QtGui.QApplication.instance().widgetAt(x, y)
 		while widget != None:
 			if isinstance(widget, IconLayout):
@@ -63,7 +157,7 @@ class InputScheme(QtCore.QObject):
 			self.releaseImages()
 			
 		widget = self.findWidgetAt(x, y)
-		if widget is not None and not isinstance(widget, FolderIcon):
+		if widget is not None and not widget.isFolder:
 			logging.info('Image grabbed %s' % widget.text)
 			self.grabImage(widget)
 			return True
@@ -76,14 +170,8 @@ class InputScheme(QtCore.QObject):
 		if len(self.grabbedIcons) == 0:
 			return False
 
-		widget = QtGui.QApplication.instance().widgetAt(x, y)
-		while widget != None:
-			if isinstance(widget, FolderIcon):
-				break
-			else:
-				widget = widget.parentWidget()
-				
-		if widget != None:
+		widget = self.findWidgetAt(x, y)
+		if widget is not None and widget.isFolder:
 			self.moveImages(widget)
 			return True
 		else:
@@ -107,15 +195,14 @@ class InputScheme(QtCore.QObject):
 			return
 
 		for icon in self.grabbedIcons:
-			p = icon.parentWidget()
-			if p is not None:
-				replacement = QtGui.QWidget(icon.parent())
-				replacement.setMinimumSize(icon.size())
-				p.layout().replaceItem(icon, replacement)
-				icon.setParent(None)
+			if self.window is not None:
+				# the board's view takes the icon off the board
+				self.window.board.moveImage(icon.text, folder.text)
 			self.imageMoved.emit(icon.text, folder.text)
 		
 		self.grabbedIcons = []
+		if self.window is not None:
+			self.window.invalidateIcons()
 		
 		folder.blink()
 		assets.play('drop')
@@ -143,9 +230,8 @@ class GazeAndGestureScheme(InputScheme):
 		self.gestureTracker = GestureDevice()
 		try:
 			self.gazeTracker = GazeDevice.getGazeDevice()
-			self.gazeTracker.ready.connect(self.ready.emit)
-			self.gazeTracker.error.connect(self.error.emit)
-			self.gazeTracker.moved.connect(self.changePreselectedIcon)
+			self.connectSignal(self.gazeTracker.ready, self.ready.emit, persistent=True)
+			self.connectSignal(self.gazeTracker.error, self.error.emit, persistent=True)
 		except Exception as exc:
 			logging.critical('Eyetribe error: %s', exc)
 			raise(Exception('Could not connect to EyeTribe'))
@@ -157,8 +243,10 @@ class GazeAndGestureScheme(InputScheme):
 		
 	def start(self):
 		super().start()
-		self.gestureTracker.grabbed.connect(self.grabbed)
-		self.gestureTracker.released.connect(self.released)
+		self.connectSignal(self.gazeTracker.moved, self.changePreselectedIcon)
+		self.connectSignal(self.gestureTracker.grabbed, self.grabbed)
+		self.connectSignal(self.gestureTracker.released, self.released)
+		self.gestureTracker.resume()
 		self.gazeTracker.reset()
 		
 	def setWindow(self, window):
@@ -166,32 +254,39 @@ class GazeAndGestureScheme(InputScheme):
 		if window is not None:
 			window.feedbackWindow.showEye()
 			window.feedbackWindow.showHand()
-			self.gestureTracker.handAppeared.connect(window.feedbackWindow.setHandGood)
-			self.gestureTracker.noHands.connect(window.feedbackWindow.setHandBad)
-			self.gestureTracker.grabbed.connect(window.feedbackWindow.setHandClosed)
-			self.gestureTracker.released.connect(window.feedbackWindow.setHandOpen)
-			self.gestureTracker.moved.connect(window.feedbackWindow.setHandGood)
-			self.gazeTracker.eyesAppeared.connect(window.feedbackWindow.setEyeGood)
-			self.gazeTracker.eyesDisappeared.connect(window.feedbackWindow.setEyeBad)
+			self.connectSignal(self.gestureTracker.handAppeared, window.feedbackWindow.setHandGood)
+			self.connectSignal(self.gestureTracker.noHands, window.feedbackWindow.setHandBad)
+			self.connectSignal(self.gestureTracker.grabbed, window.feedbackWindow.setHandClosed)
+			self.connectSignal(self.gestureTracker.released, window.feedbackWindow.setHandOpen)
+			self.connectSignal(self.gestureTracker.moved, window.feedbackWindow.setHandGood)
+			self.connectSignal(self.gazeTracker.eyesAppeared, window.feedbackWindow.setEyeGood)
+			self.connectSignal(self.gazeTracker.eyesDisappeared, window.feedbackWindow.setEyeBad)
 			
 	def grabbed(self, hand):
-		gaze = self.gazeTracker.getAttentiveGaze(clear=True)
+		gaze = self.gazeTracker.getGestureTimeGaze()
 		self.doGrab(gaze[0], gaze[1])
-		pyMouse.move(int(gaze[0]), int(gaze[1]))
+		self.moveCursor(gaze[0], gaze[1])
 		self.gazeTracker.clearLastFixation()
 		
 	def released(self, hand):
-		gaze = self.gazeTracker.getAttentiveGaze(clear=True)
+		gaze = self.gazeTracker.getGestureTimeGaze()
 		self.doRelease(gaze[0], gaze[1])
-		pyMouse.move(int(gaze[0]), int(gaze[1]))
+		self.moveCursor(gaze[0], gaze[1])
 		self.gazeTracker.clearLastFixation()
 
 	def stop(self):
 		super().stop()
+		self.gestureTracker.pause()
+		self.gazeTracker.pause()
+		
+	def shutdown(self):
+		super().shutdown()
 		self.gestureTracker.stop()
 		self.gazeTracker.stop()
 
 class MouseScheme(InputScheme):
+	drawsCursor = False
+
 	def __init__(self, window=None):
 		super().__init__(window)
 		
@@ -201,9 +296,9 @@ class MouseScheme(InputScheme):
 	def setWindow(self, window):
 		super().setWindow(window)
 		if window is not None:
-			self.window.mousePressed.connect(self.grab)
-			self.window.mouseReleased.connect(self.release)
-			self.window.mouseMoved.connect(self.moveIcon)
+			self.connectSignal(self.window.mousePressed, self.grab)
+			self.connectSignal(self.window.mouseReleased, self.release)
+			self.connectSignal(self.window.mouseMoved, self.moveIcon)
 			if type(self) == MouseScheme:
 				window.feedbackWindow.close()
 		
@@ -216,12 +311,27 @@ class MouseScheme(InputScheme):
 		pos = obj.mapToGlobal(mouseEvent.pos())
 		if self.doGrab(pos.x(), pos.y()):
 			if len(self.grabbedIcons) == 1:
-				self.floatingIcon = DraggingIcon(self.grabbedIcons[0], self.window)
+				overlay = self.getOverlay()
+				if overlay is not None:
+					self.floatingIcon = OverlayThumbnail(self.grabbedIcons[0], overlay)
+				else:
+					self.floatingIcon = DraggingIcon(self.grabbedIcons[0], self.window)
 				self.floatingIcon.move(
 					int(pos.x()-self.floatingIcon.width()/2),
 					int(pos.y()-self.floatingIcon.height()/2)
 				)
 				
+	def resetTrialState(self):
+		super().resetTrialState()
+		if self.floatingIcon is not None:
+			try:
+				self.floatingIcon.hide()
+				self.floatingIcon.close()
+			except RuntimeError:
+				# went with the previous trial's window
+				pass
+			self.floatingIcon = None
+		
 	def release(self, obj=None, mouseEvent=None, position=None):
 		if position is None:
 			position = obj.mapToGlobal(mouseEvent.pos())
@@ -233,20 +343,31 @@ class MouseScheme(InputScheme):
 
 		self.doRelease(position[0], position[1])
 			
-	def moveIcon(self):
-		pos = pyMouse.position()
+	def moveIcon(self, obj=None, mouseEvent=None, position=None):
+		if position is not None:
+			pos = position
+		elif mouseEvent is not None:
+			pos = obj.mapToGlobal(mouseEvent.pos())
+			pos = [pos.x(), pos.y()]
+		else:
+			pos = pyMouse.position()
 		if self.floatingIcon:
 			self.floatingIcon.move(pos[0] - self.floatingIcon.width()/2, pos[1]-self.floatingIcon.height()/2)
 		self.changePreselectedIcon(pos)
 
 class GestureScheme(MouseScheme):
+	# the pointer follows the hand, not the mouse, so it's drawn on the overlay like the other schemes
+	drawsCursor = True
+	
 	def __init__(self, window=None):
 		from GestureDevice import GestureDevice
 
 		self.gestureTracker = GestureDevice()
 		self.attentivePoint = None
+		self.cursor = CursorDriver()
 		super().__init__(window)
 		self.virtualPos = None
+		self.injector = createPointerInjector(self)
 		
 	def changePreselectedIcon(self, pos):
 		if self.attentivePoint is None or pos == self.attentivePoint:
@@ -254,14 +375,17 @@ class GestureScheme(MouseScheme):
 
 	def start(self):
 		super().start()
-		self.gestureTracker.grabbed.connect(self.grabbed)
-		self.gestureTracker.released.connect(self.released)
-		self.gestureTracker.moved.connect(self.handMoved)
-		self.gestureTracker.fixated.connect(self.fixated)
-		self.gestureTracker.fixationInvalidated.connect(self.fixationInvalidated)
+		self.connectSignal(self.gestureTracker.grabbed, self.grabbed)
+		self.connectSignal(self.gestureTracker.released, self.released)
+		self.connectSignal(self.gestureTracker.moved, self.handMoved)
+		self.connectSignal(self.gestureTracker.fixated, self.fixated)
+		self.connectSignal(self.gestureTracker.fixationInvalidated, self.fixationInvalidated)
+		self.gestureTracker.resume()
 		
 		mousePos = pyMouse.position()
 		self.virtualPos = [mousePos[0], mousePos[1]]
+		self.cursor.moveTo(self.virtualPos[0], self.virtualPos[1])
+		self.cursor.start()
 
 		screenSize = QtGui.QDesktopWidget().screenGeometry()
 		self.screenSize = [screenSize.width(), screenSize.height()]
@@ -271,15 +395,24 @@ class GestureScheme(MouseScheme):
 		super().setWindow(window)
 		if window is not None:
 			window.feedbackWindow.showHand()
-			self.gestureTracker.handAppeared.connect(window.feedbackWindow.setHandGood)
-			self.gestureTracker.noHands.connect(window.feedbackWindow.setHandBad)
-			self.gestureTracker.grabbed.connect(window.feedbackWindow.setHandClosed)
-			self.gestureTracker.released.connect(window.feedbackWindow.setHandOpen)
-			self.gestureTracker.moved.connect(window.feedbackWindow.setHandGood)
-			self.gestureTracker.reachingBounds.connect(window.feedbackWindow.setGestureBoundNotice)
+			self.connectSignal(self.gestureTracker.handAppeared, window.feedbackWindow.setHandGood)
+			self.connectSignal(self.gestureTracker.noHands, window.feedbackWindow.setHandBad)
+			self.connectSignal(self.gestureTracker.grabbed, window.feedbackWindow.setHandClosed)
+			self.connectSignal(self.gestureTracker.released, window.feedbackWindow.setHandOpen)
+			self.connectSignal(self.gestureTracker.moved, window.feedbackWindow.setHandGood)
+			self.connectSignal(self.gestureTracker.reachingBounds, window.feedbackWindow.setGestureBoundNotice)
+			
+			overlay = self.getOverlay()
+			if overlay is not None:
+				# the OS pointer no longer moves, so nothing reports mouseMoved for us
+				self.cursor.overlay = overlay
+				self.connectSignal(self.cursor.moved, self.cursorMoved)
+				
+	def cursorMoved(self, position):
+		self.moveIcon(position=position)
 
 	def fixated(self, handPosition):
-		self.attentivePoint = pyMouse.position()
+		self.attentivePoint = self.cursor.position()
 		self.changePreselectedIcon(self.attentivePoint)
 
 	def fixationInvalidated(self, handPosition):
@@ -291,9 +424,8 @@ class GestureScheme(MouseScheme):
 		else:
 			location = self.attentivePoint
 		
-		previousLocation = pyMouse.position()
-		pyMouse.press(round(location[0]), round(location[1]))
-		pyMouse.move(previousLocation[0], previousLocation[1])
+		self.cursor.flush()
+		self.injector.press(location[0], location[1])
 		self.gestureTracker.clearLastFixation()
 		self.attentivePoint = None
 
@@ -303,10 +435,9 @@ class GestureScheme(MouseScheme):
 		else:
 			location = self.attentivePoint
 
-		previousLocation = pyMouse.position()
-		pyMouse.release(round(location[0]), round(location[1]))
+		self.cursor.flush()
+		self.injector.release(location[0], location[1])
 		self.release(position=location)
-		pyMouse.move(previousLocation[0], previousLocation[1])
 		self.gestureTracker.clearLastFixation()
 		self.attentivePoint = None
 				
@@ -316,9 +447,19 @@ class GestureScheme(MouseScheme):
 			
 		self.virtualPos[0] = clamp(self.virtualPos[0] + delta[0], 0, self.screenSize[0])
 		self.virtualPos[1] = clamp(self.virtualPos[1] - (delta[1] + delta[2])/2 , 0, self.screenSize[1])
-		pyMouse.move(round(self.virtualPos[0]), round(self.virtualPos[1]))
+		self.cursor.moveTo(self.virtualPos[0], self.virtualPos[1])
 			
 	def stop(self):
+		super().stop()
+		self.cursor.stop()
+		self.gestureTracker.pause()
+		
+	def resetTrialState(self):
+		super().resetTrialState()
+		self.attentivePoint = None
+		
+	def shutdown(self):
+		super().shutdown()
 		self.gestureTracker.stop()
 
 class GazeAndMotionScheme(GestureScheme):
@@ -330,9 +471,8 @@ class GazeAndMotionScheme(GestureScheme):
 		
 		try:
 			self.gazeTracker = GazeDevice.getGazeDevice()
-			self.gazeTracker.ready.connect(self.ready.emit)
-			self.gazeTracker.error.connect(self.error.emit)
-			self.gazeTracker.moved.connect(self.eyesMoved)
+			self.connectSignal(self.gazeTracker.ready, self.ready.emit, persistent=True)
+			self.connectSignal(self.gazeTracker.error, self.error.emit, persistent=True)
 		except Exception as exc:
 			logging.critical('Eyetribe error: %s', exc)
 			raise(Exception('Could not connect to EyeTribe'))
@@ -353,16 +493,17 @@ class GazeAndMotionScheme(GestureScheme):
 		super().setWindow(window)
 		if window is not None:
 			window.feedbackWindow.showEye()
-			self.gazeTracker.eyesAppeared.connect(window.feedbackWindow.setEyeGood)
-			self.gazeTracker.eyesDisappeared.connect(window.feedbackWindow.setEyeBad)
+			self.connectSignal(self.gazeTracker.eyesAppeared, window.feedbackWindow.setEyeGood)
+			self.connectSignal(self.gazeTracker.eyesDisappeared, window.feedbackWindow.setEyeBad)
 
 	def grabbed(self, hand):
 		self.gestureTracker.clearLastFixation()
+		gaze = self.gazeTracker.getGestureTimeGaze()
 		self.gazeTracker.clearLastFixation()
-		gaze = self.gazeTracker.getAttentiveGaze(clear=True)
-		pyMouse.press(int(gaze[0]), int(gaze[1]))
+		self.cursor.forget()
+		self.injector.press(gaze[0], gaze[1], restore=False)
 		if settings.checkBool(settings.systemValue('syncGestureAndGaze')):
-			self.virtualPos = gaze
+			self.virtualPos = list(gaze)
 		
 	def released(self, hand):
 		super().released(hand)
@@ -374,7 +515,16 @@ class GazeAndMotionScheme(GestureScheme):
 		
 	def start(self):
 		super().start()
+		self.connectSignal(self.gazeTracker.moved, self.eyesMoved)
 		self.gazeTracker.reset()
+		
+	def stop(self):
+		super().stop()
+		self.gazeTracker.pause()
+		
+	def shutdown(self):
+		super().shutdown()
+		self.gazeTracker.stop()
 
 class GazeAndButtonScheme(InputScheme):
 	def __init__(self, window=None):
@@ -384,9 +534,8 @@ class GazeAndButtonScheme(InputScheme):
 		
 		try:
 			self.gazeTracker = GazeDevice.getGazeDevice()
-			self.gazeTracker.ready.connect(self.ready.emit)
-			self.gazeTracker.error.connect(self.error.emit)
-			self.gazeTracker.moved.connect(self.changePreselectedIcon)
+			self.connectSignal(self.gazeTracker.ready, self.ready.emit, persistent=True)
+			self.connectSignal(self.gazeTracker.error, self.error.emit, persistent=True)
 		except Exception as exc:
 			logging.critical('Eyetribe error: %s', exc)
 			raise(Exception('Could not connect to EyeTribe'))
@@ -399,26 +548,34 @@ class GazeAndButtonScheme(InputScheme):
 		if window is not None:
 			window.installEventFilter(self)
 			window.feedbackWindow.showEye()
-			self.gazeTracker.eyesAppeared.connect(window.feedbackWindow.setEyeGood)
-			self.gazeTracker.eyesDisappeared.connect(window.feedbackWindow.setEyeBad)
+			self.connectSignal(self.gazeTracker.eyesAppeared, window.feedbackWindow.setEyeGood)
+			self.connectSignal(self.gazeTracker.eyesDisappeared, window.feedbackWindow.setEyeBad)
 		
 	def eventFilter(self, widget, event):
 		if event.type() == QtCore.QEvent.KeyPress and not event.isAutoRepeat():
 			gaze = self.gazeTracker.getAttentiveGaze(clear=True)
 			self.doGrab(gaze[0], gaze[1])
-			pyMouse.move(int(gaze[0]), int(gaze[1]))
+			self.moveCursor(gaze[0], gaze[1])
 		elif event.type() == QtCore.QEvent.KeyRelease and not event.isAutoRepeat():
 			gaze = self.gazeTracker.getAttentiveGaze(clear=True)
 			self.doRelease(gaze[0], gaze[1])
-			pyMouse.move(int(gaze[0]), int(gaze[1]))
+			self.moveCursor(gaze[0], gaze[1])
 
 		return QtGui.QWidget.eventFilter(self, widget, event)
 
 	def start(self):
 		super().start()
+		self.connectSignal(self.gazeTracker.moved, self.changePreselectedIcon)
 		self.gazeTracker.reset()
 
 	def stop(self):
+		if self.window is not None:
+			self.window.removeEventFilter(self)
+		super().stop()
+		self.gazeTracker.pause()
+		
+	def shutdown(self):
+		super().shutdown()
 		self.gazeTracker.stop()
 
 class GazeScheme(InputScheme):
@@ -429,18 +586,18 @@ class GazeScheme(InputScheme):
 
 		try:
 			self.gazeTracker = GazeDevice.getGazeDevice()
-			self.gazeTracker.ready.connect(self.ready.emit)
-			self.gazeTracker.error.connect(self.error.emit)
-			self.gazeTracker.moved.connect(self.changePreselectedIcon)
+			self.connectSignal(self.gazeTracker.ready, self.ready.emit, persistent=True)
+			self.connectSignal(self.gazeTracker.error, self.error.emit, persistent=True)
 		except Exception as exc:
 			logging.critical('Eyetribe error: %s', exc)
 			raise(Exception('Could not connect to EyeTribe'))
 
 	def start(self):
 		super().start()
-		self.gazeTracker.fixated.connect(self.onFixate)
-		self.gazeTracker.eyesAppeared.connect(self.window.feedbackWindow.setEyeGood)
-		self.gazeTracker.eyesDisappeared.connect(self.window.feedbackWindow.setEyeBad)
+		self.connectSignal(self.gazeTracker.moved, self.changePreselectedIcon)
+		self.connectSignal(self.gazeTracker.fixated, self.onFixate)
+		self.connectSignal(self.gazeTracker.eyesAppeared, self.window.feedbackWindow.setEyeGood)
+		self.connectSignal(self.gazeTracker.eyesDisappeared, self.window.feedbackWindow.setEyeBad)
 		self.gazeTracker.reset()
 
 	def setWindow(self, window):
@@ -449,15 +606,9 @@ class GazeScheme(InputScheme):
 			window.feedbackWindow.showEye()
 		
 	def onFixate(self, position):
-		widget = QtGui.QApplication.instance().widgetAt(position.x, position.y)
-		while widget != None:
-			if isinstance(widget, IconLayout):
-				break
-			else:
-				widget = widget.parentWidget()
-		
+		widget = self.findWidgetAt(position.x, position.y)
 		if widget != None:
-			if isinstance(widget, FolderIcon):
+			if widget.isFolder:
 				self.doRelease(position.x, position.y)
 			else:
 				self.doGrab(position.x, position.y)
@@ -466,106 +617,162 @@ class GazeScheme(InputScheme):
 				self.doGrab(position.x, position.y)
 			else:
 				self.doRelease(position.x, position.y)
-		pyMouse.move(int(position.x), int(position.y))
+		self.moveCursor(position.x, position.y)
 		
 	def stop(self):
 		super().stop()
+		self.gazeTracker.pause()
+		
+	def shutdown(self):
+		super().shutdown()
 		self.gazeTracker.stop()
 
-class DraggingIcon(QtGui.QLabel):
-	def __init__(self, fromIcon, parentWindow):
-		super().__init__(parentWindow)
-		self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
-		self.setPixmap(QtGui.QPixmap.fromImage(fromIcon.image.scaled(75, 75)))
-		self.show()
+'''
+	Moves the OS pointer at most once per display frame, and only when the
+	rounded position actually changed
+'''
+class CursorDriver(QtCore.QObject):
+	moved = QtCore.Signal(object)
 
-class SchemeSelector(QtGui.QWidget):
-	selected = QtCore.Signal(object, object, bool)
-	closed = QtCore.Signal()
-	
-	def __init__(self):
+	def __init__(self, refreshRate=None):
 		super().__init__()
+		if refreshRate is None:
+			refreshRate = float(settings.systemValue('displayRefreshRate'))
 		
-		self.setWindowTitle('Input Scheme Selector')
-		font = self.font()
-		font.setPointSize(18)
-		self.setFont(font)
-		
-		self.setLayout(QtGui.QGridLayout())
-		
-		self.participantIDBox = QtGui.QLineEdit()
-		self.participantIDBox.setAlignment(QtCore.Qt.AlignCenter)
-		self.participantIDBox.setText(settings.systemValue('participantID'))
-		self.layout().addWidget(QtGui.QLabel('<center>Participant ID</center>'), 0, 0, 1, 2)
-		self.layout().addWidget(self.participantIDBox, 1, 0, 1, 2)
-
-		components = [
-			{'scheme':'MouseScheme', 'label': 'Mouse only'},
-			{'scheme':'GestureScheme', 'label': 'Gesture only'},
-			{'scheme':'GazeScheme', 'label': 'Gaze only'},
-			{'scheme':'GazeAndButtonScheme', 'label': 'Gaze + button'},
-			{'scheme':'GazeAndGestureScheme', 'label': 'Gaze + gesture'},
-			{'scheme':'GazeAndMotionScheme', 'label': 'Gaze + motion'},
-		]
-		
-		colors = {
-			'Practice': QtCore.Qt.yellow,
-			'Experiment': QtCore.Qt.green,
-		}
-		for column, heading in enumerate(['Practice', 'Experiment']):
-			self.layout().addWidget(QtGui.QLabel('<center>%s</center>' % heading), 2, column)
-			for rowOffset, component in enumerate(components):
-				row = 3 + rowOffset
-				b = QtGui.QPushButton(component['label'])
-				b.clicked.connect(partial(self.schemeClicked, component['scheme'], heading == 'Practice'))
-				pal = b.palette()
-				pal.setColor(pal.Button, colors[heading])
-				b.setAutoFillBackground(True)
-				b.setPalette(pal)
-				b.update()
-				self.layout().addWidget(b, row, column)
-			
-		self.label = QtGui.QLabel()
-		self.errorLabel = QtGui.QLabel()
+		self.pending = None
+		self.lastPosition = None
+		self.flushCount = 0
+		self.overlay = None
 		
-	def displayText(self, msg):
-		self.label.setText('<font size="14"><b><center>%s</center></b></font>' % msg)
+		self.timer = QtCore.QTimer()
+		self.timer.setSingleShot(False)
+		self.timer.setInterval(int(1000 / refreshRate))
+		self.timer.timeout.connect(self.flush)
 		
-	def displayError(self, msg):
-		self.errorLabel.setText('<font size="6">Error: %s</font>' % msg)
+	def start(self):
+		self.timer.start()
 		
-	def schemeClicked(self, scheme, practiceOnly):
-		participantID = self.participantIDBox.text()
-		if participantID.strip() == "":
-			QtGui.QMessageBox.critical(self, 'Error', '<font size="6">Please enter a participant ID</font>')
-			self.participantIDBox.setFocus()
-		else:
-			settings.setSystemValue('participantID', participantID)
-			while self.layout().count() > 0:
-				item = self.layout().takeAt(0)
-				widget = item.widget()
-				self.layout().removeWidget(widget)
-				widget.setParent(None)
-				del widget
-				del item
-				
-			self.displayText('Loading<br>Please wait...')
-			self.layout().addWidget(self.label, 0, 0, 1, 2)
-			self.layout().addWidget(self.errorLabel, 1, 0, 1, 2)
-			self.update()
-			self.repaint()
-			
-			self.selected.emit(scheme, participantID, practiceOnly)
+	def stop(self):
+		self.flush()
+		self.timer.stop()
+		
+	def moveTo(self, x, y):
+		self.pending = (round(x), round(y))
+		
+	def position(self):
+		if self.pending is not None:
+			return self.pending
+		if self.lastPosition is not None:
+			return self.lastPosition
+		return pyMouse.position()
+		
+	def flush(self):
+		if self.pending is None:
+			return
+		if self.pending != self.lastPosition:
+			if self.overlay is not None:
+				self.overlay.setCursorPosition(self.pending[0], self.pending[1])
+			else:
+				pyMouse.move(self.pending[0], self.pending[1])
+			self.lastPosition = self.pending
+			self.flushCount += 1
+			self.moved.emit(list(self.lastPosition))
+		self.pending = None
+		
+	def forget(self):
+		# someone else moved the pointer; don't trust our idea of where it is
+		self.pending = None
+		self.lastPosition = None
+
+'''
+	Delivers synthetic presses/releases by driving the real OS pointer, which
+	Qt then reports back to the task window
+'''
+class OSPointerInjector(object):
+	def __init__(self, scheme):
+		self.scheme = scheme
+		
+	def press(self, x, y, restore=True):
+		previousLocation = pyMouse.position()
+		pyMouse.press(round(x), round(y))
+		if restore:
+			pyMouse.move(previousLocation[0], previousLocation[1])
+		
+	def release(self, x, y, restore=True):
+		previousLocation = pyMouse.position()
+		pyMouse.release(round(x), round(y))
+		if restore:
+			pyMouse.move(previousLocation[0], previousLocation[1])
+
+'''
+	Delivers synthetic presses/releases as QMouseEvents sent straight to the
+	widget under the point, without touching the OS pointer
+'''
+class QtPointerInjector(object):
+	def __init__(self, scheme):
+		self.scheme = scheme
+		
+	def press(self, x, y, restore=True):
+		self._send(QtCore.QEvent.MouseButtonPress, x, y, QtCore.Qt.LeftButton)
+		
+	def release(self, x, y, restore=True):
+		self._send(QtCore.QEvent.MouseButtonRelease, x, y, QtCore.Qt.NoButton)
+		
+	def _send(self, eventType, x, y, buttons):
+		window = self.scheme.window
+		if window is None:
+			return
 			
-
-	def resizeEvent(self, e):
-		desktopSize = QtGui.QDesktopWidget().screenGeometry()
-		self.move(
-			(desktopSize.width() - self.size().width()) / 2,
-			(desktopSize.height() - self.size().height()) / 2
+		globalPos = QtCore.QPoint(round(x), round(y))
+		target = window.iconAt(x, y)
+		if isinstance(target, QtGui.QGraphicsItem):
+			# items on the graphics board aren't widgets; their view's viewport gets the mouse
+			target = target.scene().views()[0].viewport()
+		if target is None:
+			target = window
+		event = QtGui.QMouseEvent(
+			eventType,
+			target.mapFromGlobal(globalPos),
+			globalPos,
+			QtCore.Qt.LeftButton,
+			buttons,
+			QtCore.Qt.NoModifier
 		)
+		# sendEvent is synchronous and propagates up to the task window if the icon ignores it
+		QtGui.QApplication.sendEvent(target, event)
+
+def createPointerInjector(scheme):
+	if settings.systemValue('pointerInjection') == 'os':
+		return OSPointerInjector(scheme)
+	return QtPointerInjector(scheme)
+
+'''
+	Stand-in for DraggingIcon that draws the thumbnail on the cursor overlay
+'''
+class OverlayThumbnail(object):
+	def __init__(self, fromIcon, overlay):
+		self.overlay = overlay
+		self.pixmap = fromIcon.getThumbnail()
+		self.overlay.setThumbnail(self.pixmap)
+		
+	def width(self):
+		return self.pixmap.width()
+		
+	def height(self):
+		return self.pixmap.height()
+		
+	def move(self, x, y):
+		self.overlay.moveThumbnail(x, y)
+		
+	def hide(self):
+		self.overlay.setThumbnail(None)
+		
+	def close(self):
+		pass
 
-	def closeEvent(self, e):
-		self.hide()
-		super().closeEvent(e)
-		self.closed.emit()
+class DraggingIcon(QtGui.QLabel):
+	def __init__(self, fromIcon, parentWindow):
+		super().__init__(parentWindow)
+		self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+		self.setPixmap(fromIcon.getThumbnail())
+		self.show()
@@ -0,0 +1,386 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+'''
+	Runs an input scheme against the drag-and-drop task without any hardware.
+
+	Devices are replaced by synthetic ones (the fake Leap module and an
+	in-process EyeTribe), a scripted participant sorts every image into its
+	folder, and a virtual clock lets the whole task run as fast as the scheme
+	logic allows. Prints completion time, moves and CPU time per input sample.
+
+	python SchemeBenchmark.py GazeAndGestureScheme [--rate 60] [--seed 1]
+'''
+import sys, os, inspect, time, random, argparse, logging
+
+src_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+sys.path.insert(0, os.path.join(src_dir, 'lib'))
+sys.path.insert(0, os.path.join(src_dir, 'lib/fake'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide import QtGui, QtCore
+
+import settings
+
+class VirtualClock(object):
+	def __init__(self, start=1000000.0):
+		self.now = start
+		self.realTime = None
+
+	def __call__(self):
+		return self.now
+
+	def advance(self, seconds):
+		self.now += seconds
+
+	def install(self):
+		# the devices and detectors all read time.time()
+		self.realTime = time.time
+		time.time = self
+
+	def uninstall(self):
+		if self.realTime is not None:
+			time.time = self.realTime
+			self.realTime = None
+
+class SyntheticEyeTribeServer(QtCore.QObject):
+	outputGenerated = QtCore.Signal(object)
+	error = QtCore.Signal(object)
+	ready = QtCore.Signal()
+
+	def start(self):
+		pass
+
+	def stop(self):
+		pass
+
+	def isReady(self):
+		return True
+
+	def isRunning(self):
+		return False
+
+class SyntheticEyeTribe(object):
+	class Coord(object):
+		def __init__(self, x, y):
+			self.x = x
+			self.y = y
+
+	class Eye(object):
+		def __init__(self, x, y):
+			self.pcenter = SyntheticEyeTribe.Coord(x, y)
+
+	class Frame(object):
+		def __init__(self, state, x, y):
+			self.state = state
+			self.avg = SyntheticEyeTribe.Coord(x, y)
+			self.lefteye = SyntheticEyeTribe.Eye(0.45, 0.5)
+			self.righteye = SyntheticEyeTribe.Eye(0.55, 0.5)
+
+	def __init__(self, noise=4):
+		self.gaze = None
+		self.noise = noise
+
+	def look(self, x, y):
+		self.gaze = [x, y]
+
+	def lookAway(self):
+		self.gaze = None
+
+	def next(self, block=True):
+		if self.gaze is None:
+			return SyntheticEyeTribe.Frame(0, 0, 0)
+		return SyntheticEyeTribe.Frame(
+			0x07,
+			self.gaze[0] + random.uniform(-self.noise, self.noise),
+			self.gaze[1] + random.uniform(-self.noise, self.noise)
+		)
+
+	def connect(self):
+		pass
+
+	def close(self):
+		pass
+
+	def is_calibrating(self):
+		return False
+
+'''
+	Sorts every remaining image into its folder, driving whichever devices the
+	scheme listens to. Each generator step is one input sample.
+'''
+class Participant(object):
+	openRadius = 450
+	closedRadius = 30
+	handCenter = (0, 200, 0)
+
+	def __init__(self, driver):
+		import InputScheme
+		self.driver = driver
+		self.scheme = driver.scheme
+		self.window = driver.window
+		self.eyes = driver.eyeTribe
+		self.hand = driver.hand
+		self.injector = driver.injector
+		self.handOffset = [0.0, 0.0, 0.0]
+		self.handRadius = self.openRadius
+
+		kind = type(self.scheme)
+		self.usesMouse = kind == InputScheme.MouseScheme
+		self.usesButton = kind == InputScheme.GazeAndButtonScheme
+		self.usesHand = isinstance(self.scheme, (InputScheme.GestureScheme, InputScheme.GazeAndGestureScheme))
+		self.usesGaze = self.eyes is not None
+		self.steersAlways = kind == InputScheme.GestureScheme
+		self.steersWhileDragging = kind == InputScheme.GazeAndMotionScheme
+
+		dwell = 0
+		if self.usesGaze:
+			dwell = max(dwell, self.scheme.gazeTracker.getDwellDuration() + self.scheme.gazeTracker.getGestureLatency())
+		if hasattr(self.scheme, 'gestureTracker'):
+			dwell = max(dwell, self.scheme.gestureTracker.getDwellDuration())
+		self.dwell = dwell + 0.25
+
+	def run(self):
+		while True:
+			image = self.nextImage()
+			if image is None:
+				return
+			folder = self.folderFor(image)
+
+			self.window.ensureIconVisible(image)
+			yield from self.moveTo(image, dragging=False)
+			yield from self.press(image)
+			yield from self.moveTo(folder, dragging=True)
+			yield from self.release(folder)
+
+	def nextImage(self):
+		for imageName in self.window.board.images:
+			if self.window.board.isOnBoard(imageName):
+				return self.window.getIcon(imageName)
+		return None
+
+	def folderFor(self, image):
+		import BoardModel
+		for folderName in self.window.board.folders:
+			if BoardModel.isCorrectFolder(image.text, folderName):
+				return self.window.getFolderIcon(folderName)
+
+	def centerOf(self, icon):
+		return icon.globalCenter()
+
+	def moveTo(self, widget, dragging):
+		target = self.centerOf(widget)
+		if self.usesGaze:
+			self.eyes.look(target[0], target[1])
+		if self.steersAlways or (self.steersWhileDragging and dragging):
+			yield from self.steer(target)
+		yield from self.wait(self.dwell)
+
+	def press(self, widget):
+		target = self.centerOf(widget)
+		if self.usesMouse:
+			self.injector.press(target[0], target[1])
+			yield from self.wait(0)
+		elif self.usesButton:
+			self.sendKey(QtCore.QEvent.KeyPress)
+			yield from self.wait(0)
+		elif self.usesHand:
+			yield from self.setHandRadius(self.closedRadius)
+
+	def release(self, widget):
+		target = self.centerOf(widget)
+		if self.usesMouse:
+			self.injector.release(target[0], target[1])
+			yield from self.wait(0)
+		elif self.usesButton:
+			self.sendKey(QtCore.QEvent.KeyRelease)
+			yield from self.wait(0)
+		elif self.usesHand:
+			yield from self.setHandRadius(self.openRadius)
+
+	def sendKey(self, eventType):
+		event = QtGui.QKeyEvent(eventType, QtCore.Qt.Key_Space, QtCore.Qt.NoModifier)
+		QtGui.QApplication.sendEvent(self.window, event)
+
+	def wait(self, seconds):
+		ticks = max(1, int(seconds * self.driver.rate))
+		for i in range(ticks):
+			self.updateHand()
+			yield
+
+	def setHandRadius(self, radius, duration=0.15):
+		start = self.handRadius
+		ticks = max(1, int(duration * self.driver.rate))
+		for i in range(1, ticks + 1):
+			self.handRadius = start + (radius - start) * i / ticks
+			self.updateHand()
+			yield
+		yield from self.wait(0.1)
+
+	def steer(self, target, maximumStep=40, timeout=5.0):
+		tracker = self.scheme.gestureTracker
+		smoothRange = tracker.leftHand.getSmoothRange()
+		# palm movement reaches the transfer function scaled by the smoothing window
+		smoothing = smoothRange / (2.0 * smoothRange + 1)
+
+		for i in range(int(timeout * self.driver.rate)):
+			position = self.scheme.virtualPos
+			dx = max(-maximumStep, min(maximumStep, target[0] - position[0]))
+			dy = max(-maximumStep, min(maximumStep, target[1] - position[1]))
+			if abs(dx) < 2 and abs(dy) < 2:
+				break
+
+			if max(abs(v) for v in self.handOffset) > 40:
+				# clutch: jump back to the middle, which the glitch filter ignores
+				self.handOffset = [0.0, 0.0, 0.0]
+			else:
+				stepX = self.inverse(tracker.transferFunction, dx) / smoothing
+				stepY = self.inverse(tracker.transferFunction, -dy) / smoothing
+				self.handOffset[0] += stepX
+				self.handOffset[1] += stepY
+				self.handOffset[2] += stepY
+			self.updateHand()
+			yield
+
+		# hold still so the hand's dwell detector settles
+		yield from self.wait(0)
+
+	def inverse(self, transferFunction, output):
+		low, high = 0.0, transferFunction.maxInput
+		for i in range(24):
+			middle = (low + high) / 2
+			if transferFunction.map(middle) < abs(output):
+				low = middle
+			else:
+				high = middle
+		return low if output >= 0 else -low
+
+	def updateHand(self):
+		if self.hand is not None:
+			self.hand.setHand(
+				self.handCenter[0] + self.handOffset[0],
+				self.handCenter[1] + self.handOffset[1],
+				self.handCenter[2] + self.handOffset[2],
+				self.handRadius
+			)
+
+class SchemeBenchmark(object):
+	def __init__(self, schemeName, rate=60, timeout=600, hands=None, boardView=None):
+		self.rate = float(rate)
+		self.timeout = timeout
+		self.clock = VirtualClock()
+		self.clock.install()
+
+		import Leap, GazeDevice, InputScheme, assets
+		from DragDropUI import DragDropTaskWindow, DeviceOptionsWindow, resetRepaintCounts
+		# nobody is listening
+		assets.play = lambda sound: None
+
+		self.hand = None
+		if hands is not None:
+			import HandRecording
+			Leap.setDefaultTrajectory(HandRecording.loadTrajectory(hands, self.rate), self.rate, realTime=False)
+		else:
+			self.hand = Leap.LiveTrajectory()
+			Leap.setDefaultTrajectory(self.hand, self.rate, realTime=False)
+
+		self.eyeTribe = None
+		if 'Gaze' in schemeName:
+			self.eyeTribe = SyntheticEyeTribe()
+			GazeDevice.setGazeDevice(GazeDevice._GazeDevice(self.eyeTribe, SyntheticEyeTribeServer()))
+
+		self.scheme = getattr(InputScheme, schemeName)()
+		self.gazeDevice = getattr(self.scheme, 'gazeTracker', None)
+		self.gestureDevice = getattr(self.scheme, 'gestureTracker', None)
+		# only the gesture schemes build their own; mouse presses need one too
+		self.injector = getattr(self.scheme, 'injector', None) or InputScheme.createPointerInjector(self.scheme)
+
+		self.window = DragDropTaskWindow(boardView=boardView)
+		self.window.optionsWindow = DeviceOptionsWindow()
+		self.window.resize(1920, 1080)
+
+		self.firstMove = None
+		self.window.board.imageMoved.connect(self.imageMoved)
+
+		self.scheme.setWindow(self.window)
+		self.window.show()
+		self.scheme.start()
+		if self.gestureDevice is not None:
+			# polled once per sample instead
+			self.gestureDevice.timer.stop()
+
+		self.samples = 0
+		self.cpuTime = 0
+		resetRepaintCounts()
+
+	def imageMoved(self, imageName, destination):
+		if self.firstMove is None:
+			self.firstMove = self.clock()
+
+	def tick(self):
+		cpuStart = time.process_time()
+		if self.gazeDevice is not None:
+			self.gazeDevice._poll()
+		if self.gestureDevice is not None:
+			self.gestureDevice.poll()
+		if hasattr(self.scheme, 'cursor'):
+			self.scheme.cursor.flush()
+		QtGui.QApplication.processEvents()
+		self.cpuTime += time.process_time() - cpuStart
+
+		self.samples += 1
+		self.clock.advance(1.0 / self.rate)
+
+	def run(self):
+		from DragDropUI import getRepaintCounts
+		start = self.clock()
+		wallStart = self.clock.realTime()
+		participant = Participant(self)
+		for step in participant.run():
+			self.tick()
+			if self.clock() - start > self.timeout:
+				break
+
+		results = {
+			'completed': self.window.getRemainingImageCount() == 0,
+			'taskTime': self.clock() - start,
+			'moves': self.window.board.getMoveCount(),
+			'correct': self.window.board.getCorrectCount(),
+			'samples': self.samples,
+			'cpuPerSample': self.cpuTime / max(1, self.samples),
+			'wallTime': self.clock.realTime() - wallStart,
+			'repaints': getRepaintCounts(),
+		}
+		self.scheme.shutdown()
+		self.window.close()
+		self.clock.uninstall()
+		return results
+
+def main(args):
+	parser = argparse.ArgumentParser(description='Run an input scheme against the sorting task with synthetic devices')
+	parser.add_argument('scheme')
+	parser.add_argument('--rate', type=float, default=60, help='input samples per (virtual) second')
+	parser.add_argument('--timeout', type=float, default=600, help='give up after this many virtual seconds')
+	parser.add_argument('--seed', type=int, default=1)
+	parser.add_argument('--hands', help='replay a hand recording instead of the scripted hand')
+	parser.add_argument('--participant', default='benchmark')
+	parser.add_argument('--board', choices=['widgets', 'graphics'], help='board implementation (default: the boardView setting)')
+	options = parser.parse_args(args[1:])
+
+	random.seed(options.seed)
+	logging.basicConfig(level=logging.WARNING)
+
+	app = QtGui.QApplication(args)
+	settings.loadPersonalSettings(options.participant)
+
+	results = SchemeBenchmark(options.scheme, options.rate, options.timeout, options.hands, options.board).run()
+	print('%s: %s' % (options.scheme, 'completed' if results['completed'] else 'NOT completed'))
+	print('  task time      %.2fs (virtual)' % results['taskTime'])
+	print('  images moved   %d (%d correct)' % (results['moves'], results['correct']))
+	print('  input samples  %d' % results['samples'])
+	print('  cpu / sample   %.1fus' % (results['cpuPerSample'] * 1000000))
+	print('  wall time      %.3fs' % results['wallTime'])
+	print('  repaints       %s' % ', '.join('%s %d' % item for item in sorted(results['repaints'].items())))
+	return 0 if results['completed'] else 1
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv))
@@ -0,0 +1,32 @@
+'''
+	Names of the available input schemes. Scheme classes, and the device
+	libraries they pull in, are only imported once a scheme is picked.
+'''
+
+_schemes = [
+	{'scheme':'MouseScheme', 'label': 'Mouse only', 'devices': []},
+	{'scheme':'GestureScheme', 'label': 'Gesture only', 'devices': ['gesture']},
+	{'scheme':'GazeScheme', 'label': 'Gaze only', 'devices': ['gaze']},
+	{'scheme':'GazeAndButtonScheme', 'label': 'Gaze + button', 'devices': ['gaze']},
+	{'scheme':'GazeAndGestureScheme', 'label': 'Gaze + gesture', 'devices': ['gaze', 'gesture']},
+	{'scheme':'GazeAndMotionScheme', 'label': 'Gaze + motion', 'devices': ['gaze', 'gesture']},
+]
+
+def getSchemes():
+	return list(_schemes)
+
+def getDevices(name):
+	for s in _schemes:
+		if s['scheme'] == name:
+			return list(s['devices'])
+	return []
+
+def getSchemeClass(name):
+	if name not in [ s['scheme'] for s in _schemes ]:
+		raise ValueError('Unknown input scheme: %s' % name)
+
+	import InputScheme
+	return getattr(InputScheme, name)
+
+def createScheme(name):
+	return getSchemeClass(name)()
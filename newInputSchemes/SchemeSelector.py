@@ -0,0 +1,99 @@
+from functools import partial
+
+from PySide import QtGui, QtCore
+
+import settings, SchemeRegistry
+
+class SchemeSelector(QtGui.QWidget):
+	selected = QtCore.Signal(object, object, bool)
+	closed = QtCore.Signal()
+	
+	def __init__(self):
+		super().__init__()
+		
+		self.setWindowTitle('Input Scheme Selector')
+		font = self.font()
+		font.setPointSize(18)
+		self.setFont(font)
+		
+		self.setLayout(QtGui.QGridLayout())
+		self.label = QtGui.QLabel()
+		self.errorLabel = QtGui.QLabel()
+		self.initUI()
+		
+	def initUI(self):
+		self.participantIDBox = QtGui.QLineEdit()
+		self.participantIDBox.setAlignment(QtCore.Qt.AlignCenter)
+		self.participantIDBox.setText(settings.systemValue('participantID'))
+		self.layout().addWidget(QtGui.QLabel('<center>Participant ID</center>'), 0, 0, 1, 2)
+		self.layout().addWidget(self.participantIDBox, 1, 0, 1, 2)
+
+		components = SchemeRegistry.getSchemes()
+		
+		colors = {
+			'Practice': QtCore.Qt.yellow,
+			'Experiment': QtCore.Qt.green,
+		}
+		for column, heading in enumerate(['Practice', 'Experiment']):
+			self.layout().addWidget(QtGui.QLabel('<center>%s</center>' % heading), 2, column)
+			for rowOffset, component in enumerate(components):
+				row = 3 + rowOffset
+				b = QtGui.QPushButton(component['label'])
+				b.clicked.connect(partial(self.schemeClicked, component['scheme'], heading == 'Practice'))
+				pal = b.palette()
+				pal.setColor(pal.Button, colors[heading])
+				b.setAutoFillBackground(True)
+				b.setPalette(pal)
+				b.update()
+				self.layout().addWidget(b, row, column)
+			
+	# back to the scheme buttons for the next trial
+	def reset(self):
+		self.clearLayout()
+		self.errorLabel.setText('')
+		self.initUI()
+		
+	def clearLayout(self):
+		while self.layout().count() > 0:
+			item = self.layout().takeAt(0)
+			widget = item.widget()
+			self.layout().removeWidget(widget)
+			widget.setParent(None)
+			del widget
+			del item
+		
+	def displayText(self, msg):
+		self.label.setText('<font size="14"><b><center>%s</center></b></font>' % msg)
+		
+	def displayError(self, msg):
+		self.errorLabel.setText('<font size="6">Error: %s</font>' % msg)
+		
+	def schemeClicked(self, scheme, practiceOnly):
+		participantID = self.participantIDBox.text()
+		if participantID.strip() == "":
+			QtGui.QMessageBox.critical(self, 'Error', '<font size="6">Please enter a participant ID</font>')
+			self.participantIDBox.setFocus()
+		else:
+			settings.setSystemValue('participantID', participantID)
+			self.clearLayout()
+				
+			self.displayText('Loading<br>Please wait...')
+			self.layout().addWidget(self.label, 0, 0, 1, 2)
+			self.layout().addWidget(self.errorLabel, 1, 0, 1, 2)
+			self.update()
+			self.repaint()
+			
+			self.selected.emit(scheme, participantID, practiceOnly)
+			
+
+	def resizeEvent(self, e):
+		desktopSize = QtGui.QDesktopWidget().screenGeometry()
+		self.move(
+			(desktopSize.width() - self.size().width()) / 2,
+			(desktopSize.height() - self.size().height()) / 2
+		)
+
+	def closeEvent(self, e):
+		self.hide()
+		super().closeEvent(e)
+		self.closed.emit()
@@ -0,0 +1,47 @@
+'''
+	Keeps input schemes, and the devices they hold, alive across the trials of
+	one sitting. Between trials only the board, the scores and the detectors
+	are reset; the EyeTribe server, the Leap connection and the decoded images
+	stay warm.
+'''
+import logging
+
+import SchemeRegistry, DeviceWarmup
+
+class Session(object):
+	def __init__(self):
+		self.participantID = None
+		self.schemes = {}
+		self.calibrated = False
+		
+	def getScheme(self, name, participantID):
+		if participantID != self.participantID:
+			# device settings are per participant, so they need fresh devices
+			self.close()
+			self.participantID = participantID
+			
+		if name in self.schemes:
+			logging.debug('Reusing scheme %s' % name)
+		else:
+			self.schemes[name] = SchemeRegistry.createScheme(name)
+		return self.schemes[name]
+		
+	def needsCalibration(self, scheme):
+		return hasattr(scheme, 'gazeTracker') and not self.calibrated
+		
+	def setCalibrated(self, calibrated=True):
+		self.calibrated = calibrated
+		
+	def close(self):
+		usedGaze = False
+		for scheme in self.schemes.values():
+			scheme.shutdown()
+			usedGaze = usedGaze or hasattr(scheme, 'gazeTracker')
+		self.schemes = {}
+		self.calibrated = False
+		
+		if usedGaze:
+			# the server behind the gaze singleton has been shut down
+			import GazeDevice
+			GazeDevice.setGazeDevice(None)
+			DeviceWarmup.stop()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+'''
+	Pointer transfer functions (hand speed -> cursor speed) backed by a
+	precomputed lookup table
+'''
+
+import math
+
+'''
+	Classic power law: |x * prescale| ^ acceleration
+'''
+class PowerCurve(object):
+	def __init__(self, prescale, acceleration):
+		self.prescale = prescale
+		self.acceleration = acceleration
+
+	def __call__(self, x):
+		return abs(pow(x * self.prescale, self.acceleration))
+
+'''
+	Logistic curve; slow and precise for small movements, saturating at gain
+'''
+class SigmoidCurve(object):
+	def __init__(self, gain, midpoint, steepness):
+		self.gain = gain
+		self.midpoint = midpoint
+		self.steepness = steepness
+
+	def __call__(self, x):
+		low = 1.0 / (1 + math.exp(self.steepness * self.midpoint))
+		y = 1.0 / (1 + math.exp(-self.steepness * (x - self.midpoint)))
+		# shift so the curve passes through the origin
+		return self.gain * (y - low) / (1 - low)
+
+'''
+	Straight lines between (input, output) control points
+'''
+class PiecewiseLinearCurve(object):
+	def __init__(self, points):
+		self.points = sorted(points)
+		if not any(x > 0 for x, y in self.points) or not any(y > 0 for x, y in self.points):
+			raise ValueError('Need at least one point with positive input and output')
+		if self.points[0][0] > 0:
+			self.points.insert(0, (0, 0))
+
+	def __call__(self, x):
+		previous = self.points[0]
+		for point in self.points[1:]:
+			if x <= point[0]:
+				span = point[0] - previous[0]
+				if span == 0:
+					return point[1]
+				return previous[1] + (x - previous[0]) * (point[1] - previous[1]) / span
+			previous = point
+		return previous[1]
+
+'''
+	Power law (gain * x ^ exponent) fit to a participant's own (input, output)
+	samples by least squares in log-log space
+'''
+class FittedCurve(PowerCurve):
+	def __init__(self, samples):
+		logs = [ (math.log(x), math.log(y)) for x, y in samples if x > 0 and y > 0 ]
+		if len(logs) < 2:
+			raise ValueError('Need at least two positive samples to fit a curve')
+
+		meanX = sum(l[0] for l in logs) / len(logs)
+		meanY = sum(l[1] for l in logs) / len(logs)
+		covariance = sum((l[0] - meanX) * (l[1] - meanY) for l in logs)
+		variance = sum((l[0] - meanX)**2 for l in logs)
+		if variance == 0:
+			raise ValueError('Samples must span more than one input value')
+
+		exponent = covariance / variance
+		if exponent <= 0:
+			raise ValueError('Samples must increase with input (fitted exponent %.3f)' % exponent)
+		gain = math.exp(meanY - exponent * meanX)
+
+		# gain * x^e == (x * gain^(1/e))^e
+		super(FittedCurve, self).__init__(pow(gain, 1.0 / exponent), exponent)
+
+CURVES = ['power', 'sigmoid', 'piecewise', 'fitted']
+
+'''
+	Parses "x:y, x:y, ..." into a list of (x, y) tuples
+'''
+def parsePoints(text):
+	points = []
+	for pair in str(text).split(','):
+		if pair.strip() == '':
+			continue
+		x, y = pair.split(':')
+		points.append((float(x), float(y)))
+	return points
+
+'''
+	Maps signed per-frame hand deltas through a curve. The curve is sampled
+	once into a dense table, so map() is a constant-time interpolation.
+
+	Inputs above ignoreAbove are treated as tracking glitches and mapped to 0,
+	inputs above maxInput are clamped.
+'''
+class TransferFunction(object):
+	def __init__(self, curve, maxInput=2.5, ignoreAbove=4, resolution=1024):
+		self.maxInput = maxInput
+		self.ignoreAbove = ignoreAbove
+		self.resolution = resolution
+		self.table = None
+		self.setCurve(curve)
+
+	def setCurve(self, curve):
+		self.curve = curve
+		self.rebuild()
+
+	def rebuild(self):
+		step = self.maxInput / self.resolution
+		self.table = [ self.curve(i * step) for i in range(self.resolution + 1) ]
+		# duplicate the last entry so map() never needs a bounds check
+		self.table.append(self.table[-1])
+		self.scale = self.resolution / self.maxInput
+
+	def map(self, value):
+		negative = value < 0
+		value = abs(value)
+
+		if value > self.ignoreAbove:
+			return 0
+		elif value > self.maxInput:
+			value = self.maxInput
+
+		index = value * self.scale
+		i = int(index)
+		low = self.table[i]
+		result = low + (index - i) * (self.table[i+1] - low)
+
+		if negative:
+			return -result
+		return result
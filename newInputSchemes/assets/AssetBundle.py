@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+'''
+	Every asset packed into one file, for frozen builds
+
+	File layout (all little-endian):
+		header   magic, version, entry count
+		index    per entry: name length, name (utf-8, '/' separated), source
+		         mtime, offset, length
+		blobs    the raw file contents, back to back
+
+	The bundle is mmap'd and assets are handed out as memoryview slices of the
+	mapping, so nothing is read until it is used.
+
+	Build it from the assets directory with
+		python assets/AssetBundle.py [output]
+'''
+
+import os, sys, mmap, struct
+
+MAGIC = b'NISASSET'
+VERSION = 1
+
+_header = struct.Struct('<8sII')
+_nameLength = struct.Struct('<H')
+_entry = struct.Struct('<dQQ')
+
+# code and build leftovers that live in the assets directory
+_skipped = ['.py', '.pyc', '.bundle']
+
+class AssetBundle(object):
+	def __init__(self, path):
+		self.path = path
+		self.file = open(path, 'rb')
+		self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.view = memoryview(self.buffer)
+		
+		magic, version, count = _header.unpack_from(self.buffer, 0)
+		if magic != MAGIC or version != VERSION:
+			self.close()
+			raise ValueError('%s is not an asset bundle this version can read' % path)
+			
+		self.entries = {}
+		self.directories = {}
+		offset = _header.size
+		for i in range(count):
+			length, = _nameLength.unpack_from(self.buffer, offset)
+			offset += _nameLength.size
+			name = bytes(self.view[offset:offset + length]).decode('utf-8')
+			offset += length
+			self.entries[name] = _entry.unpack_from(self.buffer, offset)
+			offset += _entry.size
+			
+			directory, fileName = name.rpartition('/')[::2]
+			self.directories.setdefault(directory, []).append(fileName)
+			
+	def __contains__(self, name):
+		return name in self.entries
+		
+	def listDir(self, directory):
+		return list(self.directories.get(directory.strip('/'), []))
+		
+	def get(self, name):
+		mtime, offset, length = self.entries[name]
+		return self.view[offset:offset + length]
+		
+	def getModifiedTime(self, name):
+		return self.entries[name][0]
+		
+	def close(self):
+		self.view.release()
+		self.buffer.close()
+		self.file.close()
+		
+def build(sourcePath, bundlePath):
+	names = []
+	for directory, subdirectories, files in os.walk(sourcePath):
+		subdirectories[:] = sorted(d for d in subdirectories if d != '__pycache__')
+		for f in sorted(files):
+			if os.path.splitext(f)[1] in _skipped:
+				continue
+			relative = os.path.relpath(os.path.join(directory, f), sourcePath)
+			names.append(relative.replace(os.sep, '/'))
+			
+	encoded = [ name.encode('utf-8') for name in names ]
+	offset = _header.size + sum(_nameLength.size + len(e) + _entry.size for e in encoded)
+	
+	with open(bundlePath, 'wb') as out:
+		out.write(_header.pack(MAGIC, VERSION, len(names)))
+		for name, e in zip(names, encoded):
+			path = os.path.join(sourcePath, name)
+			length = os.path.getsize(path)
+			out.write(_nameLength.pack(len(e)))
+			out.write(e)
+			out.write(_entry.pack(os.path.getmtime(path), offset, length))
+			offset += length
+			
+		for name in names:
+			with open(os.path.join(sourcePath, name), 'rb') as f:
+				out.write(f.read())
+				
+	return names
+
+if __name__ == '__main__':
+	sourcePath = os.path.dirname(os.path.abspath(__file__))
+	bundlePath = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(sourcePath), 'assets.bundle')
+	names = build(sourcePath, bundlePath)
+	print('Bundled %d assets into %s' % (len(names), bundlePath))
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+'''
+	Plays the task's sound cues from memory
+
+	Every cue is decoded once up front. A mixer thread sums whatever cues are
+	playing into blocks of samples and writes them to one output stream that
+	stays open for the whole session, so overlapping cues mix rather than
+	queue up.
+
+	Writes are paced to the wall clock and kept at most one block plus the
+	stream's buffer ahead of playback, and the pipe to the player is shrunk to
+	a page, so a cue isn't queued behind a pipe full of silence.
+'''
+
+import array, io, logging, subprocess, sys, threading, time, wave
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+# not exported by fcntl before Python 3.10
+F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+
+class SoundEngine(object):
+	def __init__(self, sounds, rate=44100, blockSize=256, bufferTime=0.02, maxVoices=8):
+		self.rate = rate
+		self.blockSize = blockSize
+		self.bufferTime = bufferTime
+		self.maxVoices = maxVoices
+		self.lock = threading.Lock()
+		self.voices = []
+		self.output = None
+		self.thread = None
+		self.running = False
+		
+		self.sounds = {}
+		for name, data in sounds.items():
+			try:
+				self.sounds[name] = self._decode(data)
+			except (ValueError, wave.Error) as exc:
+				logging.warning('Could not load sound %s: %s' % (name, exc))
+				
+	def _decode(self, data):
+		w = wave.open(io.BytesIO(data))
+		try:
+			if w.getsampwidth() != 2 or w.getframerate() != self.rate or w.getnchannels() not in [1, 2]:
+				raise ValueError('expected 16 bit mono or stereo at %d Hz' % self.rate)
+			samples = array.array('h', w.readframes(w.getnframes()))
+			channels = w.getnchannels()
+		finally:
+			w.close()
+			
+		if sys.byteorder == 'big':
+			samples.byteswap()
+		if channels == 2:
+			samples = array.array('h', [ (samples[i] + samples[i + 1]) // 2 for i in range(0, len(samples) - 1, 2) ])
+		return samples
+		
+	def getPlayerCommand(self):
+		return [
+			'aplay', '-q', '-t', 'raw', '-f', 'S16_LE', '-c', '1', '-r', str(self.rate),
+			'--buffer-time=%d' % int(self.bufferTime * 1000000), '-'
+		]
+		
+	def getLeadTime(self):
+		# how far writes may run ahead of the wall clock
+		return self.bufferTime + self.blockSize / self.rate
+		
+	def start(self):
+		self.output = subprocess.Popen(self.getPlayerCommand(), stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+		if fcntl is not None:
+			try:
+				# the kernel rounds this up to a page
+				fcntl.fcntl(self.output.stdin.fileno(), F_SETPIPE_SZ, 2 * self.blockSize)
+			except OSError as exc:
+				logging.debug('Could not shrink sound pipe: %s' % exc)
+		self.running = True
+		self.thread = threading.Thread(target=self._run)
+		self.thread.daemon = True
+		self.thread.start()
+		
+	def isRunning(self):
+		return self.running
+		
+	def play(self, name):
+		with self.lock:
+			self.voices.append([self.sounds[name], 0])
+			# a burst of cues shouldn't build up; the oldest is dropped
+			if len(self.voices) > self.maxVoices:
+				self.voices.pop(0)
+				
+	def _mix(self):
+		block = [0] * self.blockSize
+		with self.lock:
+			for voice in self.voices:
+				samples, position = voice
+				for i, sample in enumerate(samples[position:position + self.blockSize]):
+					block[i] += sample
+				voice[1] = position + self.blockSize
+			self.voices = [ v for v in self.voices if v[1] < len(v[0]) ]
+			
+		mixed = array.array('h', [ max(-32768, min(32767, s)) for s in block ])
+		if sys.byteorder == 'big':
+			mixed.byteswap()
+		return mixed.tobytes()
+		
+	def _run(self):
+		# silence is written while nothing plays, so the stream never underruns
+		# and a new cue only waits behind the stream's short buffer
+		leadTime = self.getLeadTime()
+		started = time.monotonic()
+		written = 0
+		while self.running:
+			ahead = written / self.rate - (time.monotonic() - started)
+			if ahead > leadTime:
+				time.sleep(ahead - leadTime)
+				continue
+			if ahead < 0:
+				# fell behind (or the pipe was full); restart the clock rather than bursting to catch up
+				started = time.monotonic()
+				written = 0
+				
+			try:
+				self.output.stdin.write(self._mix())
+				self.output.stdin.flush()
+			except (OSError, ValueError) as exc:
+				logging.warning('Sound output closed: %s' % exc)
+				self.running = False
+			written += self.blockSize
+				
+	def stop(self):
+		self.running = False
+		if self.thread is not None:
+			self.thread.join(1)
+		if self.output is not None:
+			self.output.kill()
+			self.output = None
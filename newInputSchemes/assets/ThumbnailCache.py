@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+'''
+	Pre-scaled image pixels kept on disk between sessions
+
+	File layout (all little-endian):
+		header   magic, version, entry count, index offset
+		pixels   raw scanlines of each thumbnail, back to back
+		index    per entry: path length, path (utf-8), source mtime, width,
+		         height, bytes per line, QImage format, pixel offset
+
+	The file is mmap'd, so a thumbnail becomes a QImage with a single copy
+	out of the mapping and no decode.
+'''
+
+import os, mmap, struct, threading, logging
+from PySide import QtGui
+
+MAGIC = b'NISTHUMB'
+VERSION = 1
+
+_header = struct.Struct('<8sIIQ')
+_entry = struct.Struct('<dIIIIQ')
+_pathLength = struct.Struct('<H')
+
+class ThumbnailCache(object):
+	def __init__(self, path):
+		self.path = path
+		self.file = None
+		self.buffer = None
+		self.entries = {}
+		self.added = {}
+		# cleared after a failed save, so an unwritable location is only tried once
+		self.writable = True
+		self.lock = threading.Lock()
+		self._open()
+		
+	def _open(self):
+		try:
+			self._read()
+		except (OSError, ValueError, struct.error) as exc:
+			# unreadable or truncated; work from memory and rewrite it on the next save
+			logging.warning('Could not read thumbnail cache %s: %s' % (self.path, exc))
+			self._close()
+		
+	def _read(self):
+		if not os.path.isfile(self.path) or os.path.getsize(self.path) < _header.size:
+			return
+			
+		self.file = open(self.path, 'rb')
+		self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, count, offset = _header.unpack_from(self.buffer, 0)
+		if magic != MAGIC or version != VERSION:
+			# an old or foreign file; it gets rewritten on the next save
+			self._close()
+			return
+			
+		for i in range(count):
+			length, = _pathLength.unpack_from(self.buffer, offset)
+			offset += _pathLength.size
+			name = self.buffer[offset:offset + length].decode('utf-8')
+			offset += length
+			mtime, width, height, bytesPerLine, imageFormat, pixels = _entry.unpack_from(self.buffer, offset)
+			offset += _entry.size
+			self.entries[(name, (width, height))] = (mtime, bytesPerLine, imageFormat, pixels)
+			
+	def _close(self):
+		if self.buffer is not None:
+			self.buffer.close()
+		if self.file is not None:
+			self.file.close()
+		self.buffer = None
+		self.file = None
+		self.entries = {}
+		
+	def get(self, name, mtime, size):
+		key = (name, size)
+		with self.lock:
+			if key in self.added and self.added[key][0] == mtime:
+				return self.added[key][1]
+				
+			entry = self.entries.get(key)
+			if entry is None or entry[0] != mtime:
+				return None
+				
+			entryMtime, bytesPerLine, imageFormat, pixels = entry
+			# the QImage reads straight out of the mapping and copy() is the only copy; it has to
+			# happen under the lock, and the view be released, before save() can close the mapping
+			with memoryview(self.buffer) as view:
+				data = view[pixels:pixels + bytesPerLine * size[1]]
+				image = QtGui.QImage(data, size[0], size[1], bytesPerLine, QtGui.QImage.Format(imageFormat)).copy()
+				data.release()
+		return image
+		
+	def put(self, name, mtime, image):
+		with self.lock:
+			self.added[(name, (image.width(), image.height()))] = (mtime, image)
+			
+	def isDirty(self):
+		return len(self.added) > 0
+		
+	def save(self):
+		with self.lock:
+			if len(self.added) == 0 or not self.writable:
+				return
+			try:
+				self._write()
+			except OSError as exc:
+				# thumbnails still come from memory for the rest of the session
+				logging.warning('Could not save thumbnail cache %s: %s' % (self.path, exc))
+				self.writable = False
+				if os.path.isfile(self.path + '.tmp'):
+					try:
+						os.remove(self.path + '.tmp')
+					except OSError:
+						pass
+				if self.buffer is None:
+					self._open()
+				
+	def _write(self):
+		rows = []
+		for key, (mtime, bytesPerLine, imageFormat, pixels) in self.entries.items():
+			if key not in self.added:
+				data = self.buffer[pixels:pixels + bytesPerLine * key[1][1]]
+				rows.append((key, mtime, bytesPerLine, imageFormat, data))
+		for key, (mtime, image) in self.added.items():
+			rows.append((key, mtime, image.bytesPerLine(), int(image.format()), bytes(image.constBits())))
+			
+		directory = os.path.dirname(self.path)
+		if directory != '' and not os.path.isdir(directory):
+			os.makedirs(directory)
+			
+		temporary = self.path + '.tmp'
+		with open(temporary, 'wb') as f:
+			f.write(_header.pack(MAGIC, VERSION, 0, 0))
+			offsets = []
+			for row in rows:
+				offsets.append(f.tell())
+				f.write(row[4])
+				
+			indexOffset = f.tell()
+			for row, pixels in zip(rows, offsets):
+				(name, (width, height)), mtime, bytesPerLine, imageFormat, data = row
+				encoded = name.encode('utf-8')
+				f.write(_pathLength.pack(len(encoded)))
+				f.write(encoded)
+				f.write(_entry.pack(mtime, width, height, bytesPerLine, imageFormat, pixels))
+				
+			f.seek(0)
+			f.write(_header.pack(MAGIC, VERSION, len(rows), indexOffset))
+			
+		# the mapping has to go before the file can be replaced on Windows
+		self._close()
+		os.replace(temporary, self.path)
+		self.added = {}
+		self._open()
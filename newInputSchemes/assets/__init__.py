@@ -1,35 +1,271 @@
-import sys, os, platform
-from PySide import QtGui
+import sys, os, platform, threading, subprocess, tempfile, logging
+from collections import OrderedDict
+from PySide import QtGui, QtCore
+
+from .ThumbnailCache import ThumbnailCache
+from .AssetBundle import AssetBundle
+from .SoundEngine import SoundEngine
 
 try:
-	basePath = sys._MEIPASS
+	rootPath = sys._MEIPASS
 except:
-	basePath = os.path.abspath('.')
+	rootPath = os.path.abspath('.')
 	
-basePath = os.path.join(basePath, 'assets')
+basePath = os.path.join(rootPath, 'assets')
+
+# frozen builds ship one assets.bundle (see AssetBundle.py) instead of the directory;
+# source runs always use the loose files, even if a build has left a bundle behind
+bundlePath = os.path.join(rootPath, 'assets.bundle')
+_bundle = AssetBundle(bundlePath) if getattr(sys, 'frozen', False) and os.path.isfile(bundlePath) else None
+_extracted = {}
+_soundEngine = None
+
+_imageCache = {}
 
+# (path, size) -> QPixmap, least recently used first
+_pixmapCache = OrderedDict()
+pixmapCacheSize = 128
+# kept out of the LRU, so a board bigger than the cache can't evict its own thumbnails
+_pinnedKeys = set()
+_pinnedPixmaps = {}
+_placeholders = {}
+_loader = None
+
+# scaled images survive between sessions, so later startups skip decoding the originals;
+# None puts them in the per-user cache directory
+thumbnailCachePath = None
+_thumbnails = None
+_thumbnailsLock = threading.Lock()
 
 
 def getFileList(path):
+	if _bundle is not None:
+		return _bundle.listDir(path)
 	path = os.path.join(basePath, path)
 	return [ f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)) ]
 
 def getPathToAsset(path):
+	if _bundle is not None and path in _bundle:
+		# for consumers that can only open files
+		if path not in _extracted:
+			f, extracted = tempfile.mkstemp(suffix=os.path.splitext(path)[1])
+			os.write(f, _bundle.get(path))
+			os.close(f)
+			_extracted[path] = extracted
+		return _extracted[path]
 	return os.path.join(basePath, path)
 	
-def getQImage(path):
+def getData(path):
+	if _bundle is not None:
+		return _bundle.get(path)
+	with open(getPathToAsset(path), 'rb') as f:
+		return f.read()
+		
+def getModifiedTime(path):
+	if _bundle is not None:
+		return _bundle.getModifiedTime(path)
+	return os.path.getmtime(getPathToAsset(path))
+	
+def _loadQImage(path):
+	if _bundle is not None:
+		return QtGui.QImage.fromData(bytes(_bundle.get(path)))
 	return QtGui.QImage(getPathToAsset(path))
 	
-def getQPixmap(path):
-	return QtGui.QPixmap.fromImage(getQImage(path))
+def getQImage(path):
+	if path in _imageCache:
+		return _imageCache[path]
+	return _loadQImage(path)
+	
+def preloadImages(paths, sizes=(None,)):
+	# QImage (unlike QPixmap) may be decoded off the GUI thread
+	for path in paths:
+		for size in sizes:
+			if size is not None:
+				_scaledImage(path, size)
+			elif path not in _imageCache:
+				_imageCache[path] = _loadQImage(path)
+	
+def getQPixmap(path, size=None):
+	key = (path, size)
+	pixmap = _cachedPixmap(key)
+	if pixmap is not None:
+		return pixmap
+		
+	return _cachePixmap(key, QtGui.QPixmap.fromImage(_scaledImage(path, size)))
+	
+'''
+	Keeps the given (path, size) pixmaps cached for as long as they're pinned,
+	whatever the LRU size. Replaces the previous set of pinned pixmaps.
+'''
+def pinPixmaps(keys):
+	global _pinnedKeys
+	_pinnedKeys = set(keys)
+	for key in list(_pinnedPixmaps):
+		if key not in _pinnedKeys:
+			_cachePixmap(key, _pinnedPixmaps.pop(key))
+	for key in _pinnedKeys:
+		if key in _pixmapCache:
+			_pinnedPixmaps[key] = _pixmapCache.pop(key)
+	
+def _scaledImage(path, size):
+	if size is None:
+		return getQImage(path)
+		
+	thumbnails = getThumbnailCache()
+	mtime = getModifiedTime(path)
+	image = thumbnails.get(path, mtime, size)
+	if image is None:
+		image = getQImage(path).scaled(size[0], size[1])
+		thumbnails.put(path, mtime, image)
+	return image
+	
+def getThumbnailCachePath():
+	if thumbnailCachePath is not None:
+		return thumbnailCachePath
+		
+	# the working directory of an installed or frozen build may not be writable
+	directory = QtGui.QDesktopServices.storageLocation(QtGui.QDesktopServices.CacheLocation)
+	if not directory:
+		directory = os.path.join(tempfile.gettempdir(), 'newInputSchemes')
+	try:
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+	except OSError as exc:
+		logging.warning('Could not create cache directory %s: %s' % (directory, exc))
+	return os.path.join(directory, 'thumbnails.bin')
+	
+def getThumbnailCache():
+	global _thumbnails
+	with _thumbnailsLock:
+		if _thumbnails is None:
+			_thumbnails = ThumbnailCache(getThumbnailCachePath())
+	return _thumbnails
+	
+def saveThumbnailCache():
+	if _thumbnails is not None:
+		_thumbnails.save()
+	
+def _cachedPixmap(key):
+	if key in _pinnedPixmaps:
+		return _pinnedPixmaps[key]
+	if key in _pixmapCache:
+		_pixmapCache.move_to_end(key)
+		return _pixmapCache[key]
+	return None
+	
+def _cachePixmap(key, pixmap):
+	if key in _pinnedKeys:
+		_pinnedPixmaps[key] = pixmap
+		return pixmap
+		
+	_pixmapCache[key] = pixmap
+	while len(_pixmapCache) > pixmapCacheSize:
+		_pixmapCache.popitem(last=False)
+	return pixmap
+	
+def getPlaceholder(size):
+	if size not in _placeholders:
+		pixmap = QtGui.QPixmap(size[0], size[1])
+		pixmap.fill(QtGui.QColor('#ddd'))
+		_placeholders[size] = pixmap
+	return _placeholders[size]
+	
+'''
+	Decodes and scales an image on Qt's thread pool. QPixmaps can only be made
+	on the GUI thread, so the scaled QImage is handed back through a queued
+	signal and converted there.
+'''
+class _DecodeTask(QtCore.QRunnable):
+	def __init__(self, loader, path, size):
+		super().__init__()
+		self.loader = loader
+		self.path = path
+		self.size = size
+		
+	def run(self):
+		self.loader.decoded.emit(self.path, self.size, _scaledImage(self.path, self.size))
+		
+class ImageLoader(QtCore.QObject):
+	decoded = QtCore.Signal(object, object, object)
+	
+	def __init__(self):
+		super().__init__()
+		self.pending = {}
+		self.decoded.connect(self._decoded)
+		
+	def load(self, path, size=None, callback=None):
+		key = (path, size)
+		pixmap = _cachedPixmap(key)
+		if pixmap is not None:
+			if callback is not None:
+				callback(pixmap)
+			return
+			
+		callbacks = [] if callback is None else [callback]
+		if key in self.pending:
+			self.pending[key].extend(callbacks)
+		else:
+			self.pending[key] = callbacks
+			QtCore.QThreadPool.globalInstance().start(_DecodeTask(self, path, size))
+			
+	def _decoded(self, path, size, image):
+		pixmap = _cachePixmap((path, size), QtGui.QPixmap.fromImage(image))
+		for callback in self.pending.pop((path, size), []):
+			try:
+				callback(pixmap)
+			except RuntimeError:
+				# the widget that asked for it has been deleted in the meantime
+				pass
+				
+		if len(self.pending) == 0:
+			saveThumbnailCache()
+				
+def loadQPixmap(path, size=None, callback=None):
+	global _loader
+	if _loader is None:
+		_loader = ImageLoader()
+	_loader.load(path, size, callback)
 	
 
+def startSoundEngine():
+	global _soundEngine
+	# the engine streams to ALSA; elsewhere play() keeps using QSound
+	if platform.system() != 'Linux' or _soundEngine is not None:
+		return
+		
+	sounds = {}
+	for f in getFileList('sounds'):
+		name, extension = os.path.splitext(f)
+		if extension == '.wav':
+			sounds[name] = bytes(getData('sounds/%s' % f))
+	try:
+		engine = SoundEngine(sounds)
+		engine.start()
+		_soundEngine = engine
+	except OSError as exc:
+		logging.warning('Could not start sound engine: %s' % exc)
+		
+def stopSoundEngine():
+	global _soundEngine
+	if _soundEngine is not None:
+		_soundEngine.stop()
+		_soundEngine = None
+		
 def play(sound):
-	f = getPathToAsset('sounds/%s.wav' % sound)
+	if _soundEngine is not None and _soundEngine.isRunning() and sound in _soundEngine.sounds:
+		_soundEngine.play(sound)
+		return
+		
+	path = 'sounds/%s.wav' % sound
 	if platform.system() == 'Linux':
-		os.system('aplay "%s" >/dev/null 2>&1 &' % f)
+		if _bundle is not None:
+			player = subprocess.Popen(['aplay', '-q', '-'], stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+			player.stdin.write(_bundle.get(path))
+			player.stdin.close()
+		else:
+			os.system('aplay "%s" >/dev/null 2>&1 &' % getPathToAsset(path))
 	else:
-		QtGui.QSound.play(f)
+		QtGui.QSound.play(getPathToAsset(path))
 
 if __name__ == '__main__':
 	for i in range(3):
@@ -6,6 +6,11 @@ arch_dir = 'lib/x64' if sys.maxsize > 2**32 else 'lib/x86'
 sys.path.insert(0, os.path.abspath(os.path.join(src_dir, 'lib')))
 sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
 
+# images and sounds ship as a single bundle rather than loose files
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, 'assets')))
+import AssetBundle
+AssetBundle.build(os.path.join(src_dir, 'assets'), os.path.join(src_dir, 'assets.bundle'))
+
 a = Analysis(
 	['main.py'],
 	pathex=[],
@@ -14,9 +19,7 @@ a = Analysis(
 		('lib/*.dll', 'lib'),
 		('lib/x86/*.dll', 'lib/x86/'),
 		('lib/x86/*.pyd', 'lib/x86/'),
-		('assets/*.png', 'assets'),
-		('assets/animals', 'assets/animals'),
-		('assets/sounds', 'assets/sounds'),
+		('assets.bundle', '.'),
 	],
 	hiddenimports=[],
 	hookspath=[],
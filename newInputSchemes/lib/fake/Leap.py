@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+'''
+	Pure-python stand-in for the Leap Motion SWIG bindings.
+
+	Provides just enough of the Leap API (Controller, Frame, Hand, Vector,
+	InteractionBox, gestures, Config) for GestureDevice and friends to run
+	without the native library. Hands follow a scripted or recorded
+	trajectory instead of real tracking data.
+
+	Put lib/fake ahead of lib/x86 or lib/x64 on sys.path to use it (main.py
+	does this when started with --fake-leap).
+'''
+
+import math, time
+from collections import deque
+
+PI = math.pi
+DEG_TO_RAD = PI / 180.0
+RAD_TO_DEG = 180.0 / PI
+
+class Vector(object):
+	def __init__(self, x=0.0, y=0.0, z=0.0):
+		self.x = float(x)
+		self.y = float(y)
+		self.z = float(z)
+
+	def __add__(self, other):
+		return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+	def __sub__(self, other):
+		return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+	def __mul__(self, scalar):
+		return Vector(self.x * scalar, self.y * scalar, self.z * scalar)
+
+	def __truediv__(self, scalar):
+		return Vector(self.x / scalar, self.y / scalar, self.z / scalar)
+
+	def __neg__(self):
+		return Vector(-self.x, -self.y, -self.z)
+
+	def __eq__(self, other):
+		return isinstance(other, Vector) and self.to_tuple() == other.to_tuple()
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __getitem__(self, index):
+		return self.to_tuple()[index]
+
+	def __str__(self):
+		return '(%f, %f, %f)' % (self.x, self.y, self.z)
+
+	__repr__ = __str__
+
+	@property
+	def magnitude(self):
+		return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+	def distance_to(self, other):
+		return (self - other).magnitude
+
+	def to_tuple(self):
+		return (self.x, self.y, self.z)
+
+	def to_float_array(self):
+		return [self.x, self.y, self.z]
+
+Vector.zero = Vector()
+
+class InteractionBox(object):
+	def __init__(self, center=None, width=235.0, height=235.0, depth=147.0):
+		if center is None:
+			center = Vector(0, 200, 0)
+		self.center = center
+		self.width = width
+		self.height = height
+		self.depth = depth
+		self.is_valid = True
+
+	def normalize_point(self, position, clamp=True):
+		x = (position.x - self.center.x) / self.width + 0.5
+		y = (position.y - self.center.y) / self.height + 0.5
+		z = (position.z - self.center.z) / self.depth + 0.5
+		if clamp:
+			x, y, z = [ min(max(v, 0.0), 1.0) for v in (x, y, z) ]
+		return Vector(x, y, z)
+
+	def denormalize_point(self, normalizedPosition):
+		return Vector(
+			(normalizedPosition.x - 0.5) * self.width + self.center.x,
+			(normalizedPosition.y - 0.5) * self.height + self.center.y,
+			(normalizedPosition.z - 0.5) * self.depth + self.center.z
+		)
+
+class InterfaceList(list):
+	@property
+	def is_empty(self):
+		return len(self) == 0
+
+class Hand(object):
+	def __init__(self, id, isLeft, palmPosition, sphereRadius, pinchStrength=0.0, stabilizedPalmPosition=None, frame=None):
+		self.id = id
+		self.is_left = isLeft
+		self.is_right = not isLeft
+		self.palm_position = palmPosition
+		if stabilizedPalmPosition is None:
+			stabilizedPalmPosition = palmPosition
+		self.stabilized_palm_position = stabilizedPalmPosition
+		self.sphere_radius = sphereRadius
+		self.pinch_strength = pinchStrength
+		self.frame = frame
+		self.is_valid = True
+
+	@property
+	def grab_strength(self):
+		return min(max((150.0 - self.sphere_radius) / 120.0, 0.0), 1.0)
+
+	def __eq__(self, other):
+		return isinstance(other, Hand) and self.id == other.id and self.frame is other.frame
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.id)
+
+	def __str__(self):
+		return 'Hand Id:%d' % self.id
+
+class Gesture(object):
+	TYPE_INVALID = -1
+	TYPE_SWIPE = 1
+	TYPE_CIRCLE = 4
+	TYPE_SCREEN_TAP = 5
+	TYPE_KEY_TAP = 6
+	STATE_INVALID = -1
+	STATE_START = 1
+	STATE_UPDATE = 2
+	STATE_STOP = 3
+
+	def __init__(self, gesture=None):
+		self.id = 0
+		self.type = self.TYPE_INVALID
+		self.state = self.STATE_INVALID
+		self.duration = 0
+		self.hands = InterfaceList()
+		if gesture is not None:
+			self.__dict__.update(gesture.__dict__)
+
+class CircleGesture(Gesture): pass
+class KeyTapGesture(Gesture): pass
+class ScreenTapGesture(Gesture): pass
+class SwipeGesture(Gesture): pass
+
+class Frame(object):
+	def __init__(self, id=0, timestamp=0, hands=None, interactionBox=None, previous=None):
+		self.id = id
+		self.timestamp = timestamp
+		self.hands = InterfaceList(hands or [])
+		self.interaction_box = interactionBox or InteractionBox()
+		self.fingers = InterfaceList()
+		self.tools = InterfaceList()
+		self.previous = previous
+		self.is_valid = True
+
+	def hand(self, id):
+		for hand in self.hands:
+			if hand.id == id:
+				return hand
+		return Hand.invalid
+
+	def gestures(self, sinceFrame=None):
+		return InterfaceList()
+
+	def __str__(self):
+		return 'Frame Id:%d Timestamp:%d Hands:%d' % (self.id, self.timestamp, len(self.hands))
+
+Hand.invalid = Hand(-1, False, Vector(), 0)
+Hand.invalid.is_valid = False
+Frame.invalid = Frame(-1)
+Frame.invalid.is_valid = False
+
+class Config(object):
+	def __init__(self):
+		self.values = {}
+
+	def get(self, key):
+		return self.values.get(key)
+
+	def set(self, key, value):
+		self.values[key] = value
+		return True
+
+	def save(self):
+		return True
+
+'''
+	A single tracked hand at one instant
+'''
+class HandSample(object):
+	def __init__(self, id, isLeft, x, y, z, sphereRadius, pinchStrength=0.0, stabilizedPosition=None):
+		self.id = id
+		self.isLeft = isLeft
+		self.position = Vector(x, y, z)
+		self.stabilizedPosition = stabilizedPosition
+		self.sphereRadius = sphereRadius
+		self.pinchStrength = pinchStrength
+
+'''
+	Linearly interpolates a hand between keyframes of
+	(seconds, x, y, z, sphereRadius[, pinchStrength]).
+	Returns no hands before the first or after the last keyframe unless loop
+	is set.
+'''
+class ScriptedTrajectory(object):
+	def __init__(self, keyframes, handID=1, isLeft=False, loop=False):
+		self.keyframes = sorted(keyframes)
+		self.handID = handID
+		self.isLeft = isLeft
+		self.loop = loop
+		self.duration = self.keyframes[-1][0]
+
+	def handsAt(self, t):
+		if self.loop and self.duration > 0:
+			t = t % self.duration
+		if t < self.keyframes[0][0] or t > self.duration:
+			return []
+
+		previous = self.keyframes[0]
+		for keyframe in self.keyframes:
+			if keyframe[0] >= t:
+				break
+			previous = keyframe
+
+		span = keyframe[0] - previous[0]
+		ratio = 0 if span == 0 else (t - previous[0]) / span
+		values = [ a + (b - a) * ratio for a, b in zip(previous[1:], keyframe[1:]) ]
+		return [ HandSample(self.handID, self.isLeft, *values) ]
+
+'''
+	Plays back a list of per-frame lists of HandSamples, one entry per frame
+'''
+class RecordedTrajectory(object):
+	def __init__(self, frames, frameRate, loop=False):
+		self.frames = frames
+		self.frameRate = float(frameRate)
+		self.loop = loop
+		self.duration = len(frames) / self.frameRate
+
+	def handsAt(self, t):
+		index = int(t * self.frameRate)
+		if self.loop:
+			index = index % len(self.frames)
+		if index < 0 or index >= len(self.frames):
+			return []
+		return self.frames[index]
+
+'''
+	A single hand whose state is set directly by the caller between frames,
+	for closed-loop drivers that react to what the application does
+'''
+class LiveTrajectory(object):
+	def __init__(self, handID=1, isLeft=False):
+		self.handID = handID
+		self.isLeft = isLeft
+		self.sample = None
+
+	def setHand(self, x, y, z, sphereRadius, pinchStrength=0.0):
+		self.sample = HandSample(self.handID, self.isLeft, x, y, z, sphereRadius, pinchStrength)
+
+	def clearHand(self):
+		self.sample = None
+
+	def handsAt(self, t):
+		if self.sample is None:
+			return []
+		return [ self.sample ]
+
+'''
+	A hand that drifts in a slow circle and grabs/releases every few seconds
+'''
+def demoTrajectory(openRadius=120, closedRadius=35):
+	keyframes = []
+	for step in range(41):
+		t = step * 0.25
+		angle = 2 * PI * step / 40
+		# open for two seconds, then closed for two
+		radius = closedRadius if (t % 4) >= 2 else openRadius
+		keyframes.append((t, 80 * math.cos(angle), 200 + 40 * math.sin(angle), 0, radius))
+	return ScriptedTrajectory(keyframes, loop=True)
+
+_defaultTrajectory = None
+_defaultFrameRate = 110.0
+_defaultRealTime = True
+
+'''
+	Sets what Controllers created without arguments will play. With realTime
+	off each call to frame() steps the trajectory by exactly one frame, so
+	tests and benchmarks run as fast as the consumer can poll.
+'''
+def setDefaultTrajectory(trajectory, frameRate=110.0, realTime=True):
+	global _defaultTrajectory, _defaultFrameRate, _defaultRealTime
+	_defaultTrajectory = trajectory
+	_defaultFrameRate = float(frameRate)
+	_defaultRealTime = realTime
+
+class Listener(object):
+	def on_init(self, controller): pass
+	def on_connect(self, controller): pass
+	def on_disconnect(self, controller): pass
+	def on_exit(self, controller): pass
+	def on_frame(self, controller): pass
+
+class Controller(object):
+	POLICY_DEFAULT = 0
+	POLICY_BACKGROUND_FRAMES = 1
+	POLICY_IMAGES = 2
+	POLICY_OPTIMIZE_HMD = 4
+
+	def __init__(self, trajectory=None, frameRate=None, realTime=None, historySize=60):
+		if trajectory is None:
+			trajectory = _defaultTrajectory or demoTrajectory()
+		self.trajectory = trajectory
+		self.frameRate = float(frameRate or _defaultFrameRate)
+		self.realTime = _defaultRealTime if realTime is None else realTime
+
+		self.config = Config()
+		self.policyFlags = 0
+		self.enabledGestures = set()
+		self.listeners = []
+		self.interactionBox = InteractionBox()
+
+		self.startTime = time.time()
+		self.stepsTaken = 0
+		self.history = deque(maxlen=historySize)
+		self.is_connected = True
+		self.has_focus = True
+
+	def is_service_connected(self):
+		return True
+
+	def now(self):
+		return int(self.elapsed() * 1000000)
+
+	def elapsed(self):
+		if self.realTime:
+			return time.time() - self.startTime
+		return self.stepsTaken / self.frameRate
+
+	def frame(self, history=0):
+		if history == 0:
+			if self.realTime:
+				frameID = int(self.elapsed() * self.frameRate)
+			else:
+				self.stepsTaken += 1
+				frameID = self.stepsTaken
+			if len(self.history) == 0 or self.history[-1].id != frameID:
+				self._buildFrame(frameID)
+		if history >= len(self.history):
+			return Frame.invalid
+		return self.history[-1 - history]
+
+	def _buildFrame(self, frameID):
+		t = frameID / self.frameRate
+		previous = self.history[-1] if len(self.history) > 0 else None
+		frame = Frame(frameID, int(t * 1000000), [], self.interactionBox, previous)
+		for sample in self.trajectory.handsAt(t):
+			frame.hands.append(Hand(
+				sample.id,
+				sample.isLeft,
+				sample.position,
+				sample.sphereRadius,
+				sample.pinchStrength,
+				sample.stabilizedPosition,
+				frame=frame
+			))
+		self.history.append(frame)
+		for listener in self.listeners:
+			listener.on_frame(self)
+
+	def set_policy_flags(self, flags):
+		self.policyFlags = flags
+
+	def set_policy(self, policy):
+		self.policyFlags |= policy
+
+	def clear_policy(self, policy):
+		self.policyFlags &= ~policy
+
+	def is_policy_set(self, policy):
+		return (self.policyFlags & policy) != 0
+
+	def enable_gesture(self, type, enable=True):
+		if enable:
+			self.enabledGestures.add(type)
+		else:
+			self.enabledGestures.discard(type)
+
+	def is_gesture_enabled(self, type):
+		return type in self.enabledGestures
+
+	def add_listener(self, listener):
+		self.listeners.append(listener)
+		listener.on_connect(self)
+		return True
+
+	def remove_listener(self, listener):
+		if listener in self.listeners:
+			self.listeners.remove(listener)
+			listener.on_disconnect(self)
+			return True
+		return False
+
+if __name__ == '__main__':
+	controller = Controller(realTime=False)
+	count = 20000
+	start = time.time()
+	for i in range(count):
+		frame = controller.frame()
+	print('%d frames in %.3fs (%.0f fps)' % (count, time.time() - start, count / (time.time() - start)))
+	print(frame)
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+'''
+	Placeholder for the native LeapPython extension; everything GestureDevice
+	needs lives in the fake Leap module next to this file.
+'''
@@ -8,24 +8,33 @@ src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
 arch_dir = 'lib/x64' if sys.maxsize > 2**32 else 'lib/x86'
 sys.path.insert(0, os.path.abspath(os.path.join(src_dir, 'lib')))
 sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
+if '--fake-leap' in sys.argv:
+	sys.path.insert(0, os.path.abspath(os.path.join(src_dir, 'lib/fake')))
 
 from PySide import QtGui, QtCore
 
-from DragDropUI import *
-import InputScheme
-import DragAndDropTask
+# schemes, devices and the task window are imported once a scheme is picked
+import DeviceWarmup, SchemeRegistry, assets
+from SchemeSelector import SchemeSelector
+from Session import Session
 
 QtGui.QApplication.setStyle('Cleanlooks')
 app = QtGui.QApplication(sys.argv)
 appWindow = None
+taskWindow = None
 scheme = None
+waitingForScheme = False
+session = Session()
+# schemes are reused across trials, so the selector's handlers are only connected once per scheme
+connectedSchemes = set()
 
 def bailOut(*args):
 	global app
 	
 	try:
-		if scheme is not None:
-			scheme.stop()
+		session.close()
+		DeviceWarmup.stop()
+		assets.stopSoundEngine()
 		app.exit()
 	except Exception as exc:
 		print(exc)
@@ -36,12 +45,26 @@ signal.signal(signal.SIGTERM, bailOut)
 signal.signal(signal.SIGINT, bailOut)
 
 def schemeLoaded():
-	global app, appWindow, scheme
+	global app, appWindow, taskWindow, scheme, waitingForScheme
+	import DragAndDropTask
+	if not waitingForScheme:
+		return
+	waitingForScheme = False
+	
 	appWindow.hide()
-	appWindow = DragAndDropTask.main(scheme, app=app)
+	calibrate = session.needsCalibration(scheme)
+	taskWindow = DragAndDropTask.main(scheme, app=app, calibrate=calibrate)
+	if calibrate:
+		session.setCalibrated()
+	taskWindow.closed.connect(trialFinished)
+	
+def trialFinished():
+	# the selector comes back for the next trial, with the devices still warm
+	appWindow.reset()
+	appWindow.show()
 
 def schemeSelected(schemeName, participantID, practiceOnly):
-	global app, appWindow, scheme
+	global app, appWindow, scheme, waitingForScheme
 	# need to keep a handle on the window, or else it will be garbage collected
 	
 	participantPath = 'logs/%s' % participantID
@@ -53,20 +76,34 @@ def schemeSelected(schemeName, participantID, practiceOnly):
 	else:
 		logFile = '%s/%d-%s.log' % (participantPath, int(time.time()), schemeName)
 		
+	# each trial gets its own log file
+	rootLogger = logging.getLogger()
+	for handler in list(rootLogger.handlers):
+		rootLogger.removeHandler(handler)
+		handler.close()
 	logging.basicConfig(
 		format='%(levelname)-8s %(asctime)s %(message)s',
 		filename=logFile,
 		level=logging.DEBUG,
 	)
 	settings.loadPersonalSettings(participantID)
+	settings.setSystemValue('lastScheme', schemeName)
 
 	try:
-		scheme = getattr(InputScheme, schemeName)()
+		if settings.checkBool(settings.systemValue('warmUpDevices')):
+			# no-op for devices that are already warming up
+			DeviceWarmup.start(SchemeRegistry.getDevices(schemeName))
+		scheme = session.getScheme(schemeName, participantID)
+		waitingForScheme = True
 		if scheme.isReady():
 			schemeLoaded()
 		else:
-			scheme.ready.connect(schemeLoaded)
-			scheme.error.connect(appWindow.displayError)
+			# forget schemes the session has shut down
+			connectedSchemes.intersection_update(session.schemes.values())
+			if scheme not in connectedSchemes:
+				scheme.connectSignal(scheme.ready, schemeLoaded, persistent=True)
+				scheme.connectSignal(scheme.error, appWindow.displayError, persistent=True)
+				connectedSchemes.add(scheme)
 		
 		if practiceOnly:
 			logging.debug('Loaded PRACTICE scheme %s for participant %s' % (schemeName, participantID))
@@ -84,10 +121,14 @@ def schemeSelected(schemeName, participantID, practiceOnly):
 def main(args):
 	global app, appWindow
 
-	appWindow = InputScheme.SchemeSelector()
+	assets.startSoundEngine()
+	appWindow = SchemeSelector()
 	appWindow.show()
 	appWindow.selected.connect(schemeSelected)
 	appWindow.closed.connect(bailOut)
+	if settings.checkBool(settings.systemValue('warmUpDevices')):
+		# images, and the devices of the scheme run last time, get going while the participant ID is typed in
+		DeviceWarmup.start(SchemeRegistry.getDevices(settings.systemValue('lastScheme')))
 	try:
 		app.exec_()
 	except Exception as exc:
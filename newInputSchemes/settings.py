@@ -7,7 +7,13 @@ _personalSettings = None
 
 _systemDefaults = {
 	'participantID': 'test',
+	'lastScheme': '',
 	'syncGestureAndGaze': True,
+	'displayRefreshRate': 60,
+	'pointerInjection': 'qt',
+	'overlayCursor': True,
+	'warmUpDevices': True,
+	'boardView': 'widgets',
 }
 
 _gestureDefaults = {
@@ -21,13 +27,26 @@ _gestureDefaults = {
 	'minGrab': 30,
 	'maxGrab': 450,
 	'useStabilizedPalm': True,
-	'smoothRange': 1
+	'smoothRange': 1,
+	'transferCurve': 'power',
+	'transferPoints': '',
+	'sigmoidMidpoint': 1.25,
+	'sigmoidSteepness': 4.0,
+	'predictGrab': False,
+	'grabPredictionWindow': 0.1,
+	'grabPredictionLead': 0.05,
+	'grabPredictionConfidence': 0.8,
+	'selectionMode': 'threshold',
+	'tapMinVelocity': 50.0,
+	'tapHistory': 0.1,
+	'recordHands': False,
 }
 
 _gazeDefaults = {
 	'dwellDuration': 0.35,
 	'dwellRange': 75,
 	'attentionPeriod': .4,
+	'gestureLatency': .15,
 }
 
 def loadPersonalSettings(userID):